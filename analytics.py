@@ -0,0 +1,274 @@
+# analytics.py
+# Time-to-first-response and time-to-resolution percentiles (p50/p90/p99)
+# per role (assigned_to), department, category and week.
+#
+# Incremental: complaint_history is read once, in id order, from the
+# "history" high-water mark. A complaint's first history row (other than an
+# SLA escalation) is its first response; it is resolved at resolved_at (or, for complaints resolved before
+# that column was filled in, at its last history row). Each new time is
+# counted into a log-scale bucket of timing_histogram, so a page view only
+# sums bucket counts; percentiles come out within about ±5% (GROWTH).
+import math
+from collections import Counter
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+import cache
+from escalation import ESCALATED_ACTION
+from extensions import db
+from models import AnalyticsMark, Complaint, ComplaintHistory, ComplaintTiming, TimingHistogram
+
+GROWTH = 1.1
+METRICS = ("response", "resolution")
+QUANTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+DIMENSIONS = ("assigned_to", "department", "category", "week")
+MARK = "history"
+FRESH_KEY = "analytics:fresh"
+
+
+def bucket(seconds):
+    return int(math.log(max(seconds, 1.0)) / math.log(GROWTH))
+
+
+def bucket_seconds(b):
+    """Geometric middle of a bucket."""
+    return GROWTH ** (b + 0.5)
+
+
+def week_of(moment):
+    day = moment.date()
+    return day - timedelta(days=day.weekday())
+
+
+# ===================================================================
+# INCREMENTAL UPDATE
+# ===================================================================
+def _mark():
+    return db.session.scalar(select(AnalyticsMark.value).where(AnalyticsMark.name == MARK)) or 0
+
+
+def _advance(old, new):
+    """Compare-and-set the mark; False if another refresh moved it first."""
+    moved = db.session.execute(
+        update(AnalyticsMark)
+        .where(AnalyticsMark.name == MARK, AnalyticsMark.value == old)
+        .values(value=new)
+    ).rowcount
+    if moved:
+        return True
+    if old:
+        return False
+    try:
+        with db.session.begin_nested():
+            db.session.add(AnalyticsMark(name=MARK, value=new))
+        return True
+    except IntegrityError:
+        return False
+
+
+def _bump(key, n):
+    metric, assigned_to, department, category, week, b = key
+    match = (
+        TimingHistogram.metric == metric,
+        TimingHistogram.assigned_to == assigned_to,
+        TimingHistogram.department == department,
+        TimingHistogram.category == category,
+        TimingHistogram.week == week,
+        TimingHistogram.bucket == b,
+    )
+    stmt = update(TimingHistogram).where(*match).values(count=TimingHistogram.count + n)
+    if db.session.execute(stmt).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(TimingHistogram(
+                metric=metric, assigned_to=assigned_to, department=department,
+                category=category, week=week, bucket=b, count=n,
+            ))
+    except IntegrityError:
+        # Another transaction created the row first
+        db.session.execute(stmt)
+
+
+def _refresh_slice(batch, settle):
+    mark = _mark()
+
+    # History timestamps are UTC (set by the app, like complaint.created_at).
+    # Rows younger than `settle` may sit behind a lower id that is not
+    # committed yet; stop there so the mark never skips a row.
+    cutoff = datetime.utcnow() - timedelta(seconds=settle)
+    rows = db.session.execute(
+        select(ComplaintHistory.id, ComplaintHistory.complaint_id, ComplaintHistory.created_at,
+               ComplaintHistory.action)
+        .where(ComplaintHistory.id > mark)
+        .order_by(ComplaintHistory.id)
+        .limit(batch)
+    ).all()
+
+    first, top = {}, None
+    for hid, complaint_id, created_at, action in rows:
+        if created_at > cutoff:
+            break
+        if action != ESCALATED_ACTION:
+            first.setdefault(complaint_id, created_at)
+        top = hid
+
+    if top is None or not _advance(mark, top):
+        db.session.rollback()
+        return None
+
+    facts = {
+        t.complaint_id: t
+        for t in ComplaintTiming.query.filter(ComplaintTiming.complaint_id.in_(first))
+    }
+    complaints = db.session.execute(
+        select(Complaint.id, Complaint.assigned_to, Complaint.department, Complaint.category,
+               Complaint.created_at, Complaint.status, Complaint.resolved_at)
+        .where(Complaint.id.in_(first))
+    ).all()
+
+    # Resolved before resolved_at was recorded: the last history row is the
+    # resolution (it may lie beyond this slice)
+    legacy = [c.id for c in complaints if c.status == "Resolved" and c.resolved_at is None
+              and (c.id not in facts or facts[c.id].resolved_at is None)]
+    last = dict(
+        db.session.query(ComplaintHistory.complaint_id, func.max(ComplaintHistory.created_at))
+        .filter(ComplaintHistory.complaint_id.in_(legacy))
+        .group_by(ComplaintHistory.complaint_id)
+    ) if legacy else {}
+
+    samples = Counter()
+    for cid, assigned_to, department, category, created_at, status, resolved_at in complaints:
+        fact = facts.get(cid)
+        if fact is None:
+            if created_at is None:
+                continue
+            fact = ComplaintTiming(
+                complaint_id=cid, assigned_to=assigned_to or '', department=department or '',
+                category=category, created_at=created_at,
+            )
+            db.session.add(fact)
+
+        group = (fact.assigned_to, fact.department, fact.category, week_of(fact.created_at))
+
+        if fact.responded_at is None:
+            fact.responded_at = first[cid]
+            seconds = (fact.responded_at - fact.created_at).total_seconds()
+            samples[("response", *group, bucket(seconds))] += 1
+
+        if fact.resolved_at is None and status == "Resolved":
+            fact.resolved_at = resolved_at or last[cid]
+            seconds = (fact.resolved_at - fact.created_at).total_seconds()
+            samples[("resolution", *group, bucket(seconds))] += 1
+
+    db.session.flush()
+    for key, n in samples.items():
+        _bump(key, n)
+
+    db.session.commit()
+    return len(first)
+
+
+def refresh():
+    """Fold history past the mark into timings and histograms. Returns complaints touched."""
+    config = current_app.config
+    batch = config.get("ANALYTICS_BATCH_SIZE", 1000)
+    settle = config.get("ANALYTICS_SETTLE_SECONDS", 30)
+
+    touched = 0
+    while True:
+        n = _refresh_slice(batch, settle)
+        if n is None:
+            return touched
+        touched += n
+
+
+def refresh_if_stale():
+    """refresh() at most once per ANALYTICS_REFRESH_SECONDS per cache."""
+    if cache.get(FRESH_KEY):
+        return
+    refresh()
+    cache.set(FRESH_KEY, True, ttl=current_app.config.get("ANALYTICS_REFRESH_SECONDS", 60))
+
+
+# ===================================================================
+# READ SIDE
+# ===================================================================
+def stats(histogram):
+    """{"n", "p50", "p90", "p99"} (seconds) from {bucket: count}."""
+    total = sum(histogram.values())
+    out = {"n": total}
+    buckets = sorted(histogram.items())
+    for name, q in QUANTILES:
+        out[name] = None
+        seen = 0
+        for b, n in buckets:
+            seen += n
+            if seen >= q * total:
+                out[name] = bucket_seconds(b)
+                break
+    return out
+
+
+def report():
+    """{"overall": {metric: stats}, dimension: [(label, {metric: stats})]}."""
+    weeks = current_app.config.get("ANALYTICS_WEEKS", 12)
+    since = week_of(datetime.utcnow()) - timedelta(weeks=weeks - 1)
+
+    out = {}
+    overall = {metric: Counter() for metric in METRICS}
+    for dimension in DIMENSIONS:
+        column = getattr(TimingHistogram, dimension)
+        query = db.session.query(
+            TimingHistogram.metric, column, TimingHistogram.bucket, func.sum(TimingHistogram.count)
+        ).group_by(TimingHistogram.metric, column, TimingHistogram.bucket)
+        if dimension == "week":
+            query = query.filter(TimingHistogram.week >= since)
+
+        groups = {}
+        for metric, label, b, n in query:
+            groups.setdefault(label, {m: {} for m in METRICS})[metric][b] = int(n)
+            if dimension == "assigned_to":
+                overall[metric][b] += int(n)
+
+        out[dimension] = [
+            (label, {metric: stats(h) for metric, h in hists.items()})
+            for label, hists in sorted(groups.items())
+        ]
+
+    out["overall"] = {metric: stats(h) for metric, h in overall.items()}
+    return out
+
+
+def duration(seconds):
+    """Template filter: 95 → "2 min", 7200 → "2.0 h"."""
+    if seconds is None:
+        return "—"
+    if seconds < 3600:
+        return f"{max(1, round(seconds / 60))} min"
+    if seconds < 3 * 86400:
+        return f"{seconds / 3600:.1f} h"
+    return f"{seconds / 86400:.1f} d"
+
+
+@click.command("refresh-analytics")
+@click.option("--rebuild", is_flag=True, help="Forget all timings and reprocess the whole history.")
+@with_appcontext
+def refresh_analytics_command(rebuild):
+    """Fold new complaint history into the resolution-time analytics."""
+    if rebuild:
+        db.session.execute(delete(TimingHistogram))
+        db.session.execute(delete(ComplaintTiming))
+        db.session.execute(delete(AnalyticsMark).where(AnalyticsMark.name == MARK))
+        db.session.commit()
+    click.echo(f"Updated timings of {refresh()} complaints.")
+    cache.delete(FRESH_KEY)
+
+
+def init_app(app):
+    app.add_template_filter(duration, "duration")
@@ -1,9 +1,16 @@
 # ao.py (FINAL FIXED VERSION — SAME LOGIC AS WARDEN & HOD)
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_required, current_user
-from extensions import db
-from models import Complaint, ComplaintHistory
-import os, uuid
+from models import Complaint
+from query_counter import query_budget
+from db_routing import read_replica
+from pagination import keyset_paginate
+import duplicates
+import fragments
+import workflow
+from sqlalchemy.orm import joinedload
+from timeline import latest_events
+from uploads import first_attachments
 
 ao = Blueprint('ao', __name__, template_folder='templates/ao')
 
@@ -13,17 +20,30 @@ ao = Blueprint('ao', __name__, template_folder='templates/ao')
 # ========================================================
 @ao.route('/dashboard')
 @login_required
+@query_budget(6)
+@read_replica
 def ao_dashboard():
 
     if current_user.role != 'ao':
         flash('Access denied', 'danger')
         return redirect('/')
 
-    complaints = Complaint.query.filter_by(
-        assigned_to='ao'
-    ).order_by(Complaint.created_at.desc()).all()
+    def page():
+        complaints = keyset_paginate(
+            Complaint.query.options(
+                joinedload(Complaint.student)
+            ).filter_by(
+                assigned_to='ao',
+                cluster_id=None
+            )
+        )
+        return dict(complaints=complaints,
+                    first_files=first_attachments(complaints),
+                    cluster_sizes=duplicates.cluster_sizes([c.id for c in complaints]),
+                    timelines=latest_events([c.id for c in complaints]))
 
-    return render_template('ao/dashboard.html', complaints=complaints)
+    # Re-rendered only after a complaint in this queue changes
+    return fragments.render('ao/dashboard.html', 'ao', page)
 
 
 
@@ -40,6 +60,11 @@ def respond(complaint_id):
 
     c = Complaint.query.get_or_404(complaint_id)
 
+    # Escalated or re-routed complaints are no longer in this queue
+    if not workflow.handles(current_user, c):
+        flash("This complaint is not assigned to you.", "warning")
+        return redirect(url_for('ao.ao_dashboard'))
+
     # 🔒 Already resolved — no more responding
     if c.status == "Resolved":
         flash("This complaint is already resolved.", "info")
@@ -52,64 +77,22 @@ def respond(complaint_id):
     if request.method == "POST":
 
         response_text = request.form.get("response")
-        before_uploads = request.files.getlist("before_attachments")
-        after_uploads = request.files.getlist("after_attachments")
 
         if not response_text:
             flash("Response cannot be empty.", "danger")
             return redirect(url_for('ao.respond', complaint_id=c.id))
 
-        upload_dir = current_app.config.get("UPLOAD_FOLDER", "uploads")
-        os.makedirs(upload_dir, exist_ok=True)
-
-        # -----------------------------
-        # SAVE BEFORE FILES
-        # -----------------------------
-        before_list = []
-        for f in before_uploads:
-            if f and f.filename:
-                ext = os.path.splitext(f.filename)[1]
-                new_name = f"BEFORE_{uuid.uuid4().hex}{ext}"
-                f.save(os.path.join(upload_dir, new_name))
-                before_list.append(new_name)
-
-        if before_list:
-            existing = c.before_files.split(",") if c.before_files else []
-            c.before_files = ",".join(existing + before_list)
-
-        # -----------------------------
-        # SAVE AFTER FILES (Stage 1)
-        # -----------------------------
-        after_list = []
-        for f in after_uploads:
-            if f and f.filename:
-                ext = os.path.splitext(f.filename)[1]
-                new_name = f"AFTER_{uuid.uuid4().hex}{ext}"
-                f.save(os.path.join(upload_dir, new_name))
-                after_list.append(new_name)
-
-        if after_list:
-            existing = c.after_files.split(",") if c.after_files else []
-            c.after_files = ",".join(existing + after_list)
-
-        # -----------------------------
-        # SET STATUS
-        # -----------------------------
-        c.status = "In Progress"
-        c.response = response_text
-        c.response_by = current_user.name
-
-        # History record
-        history = ComplaintHistory(
-            complaint_id=c.id,
-            action="Responded by AO (Before Work)",
-            message=response_text,
-            performed_by=current_user.name
-        )
+        # BEFORE files, plus any AFTER files already available at Stage 1
+        files = [(f, "before") for f in request.files.getlist("before_attachments")]
+        files += [(f, "after") for f in request.files.getlist("after_attachments")]
 
-        db.session.add(history)
-        db.session.add(c)
-        db.session.commit()
+        try:
+            workflow.transition(c, "respond", current_user.name,
+                                "Responded by AO (Before Work)",
+                                response=response_text, files=files)
+        except workflow.TransitionError as e:
+            flash(str(e), "warning")
+            return redirect(url_for('ao.ao_dashboard'))
 
         flash("Response submitted! Work now In Progress.", "success")
         return redirect(url_for('ao.ao_dashboard'))
@@ -131,42 +114,25 @@ def resolve_complaint(complaint_id):
 
     c = Complaint.query.get_or_404(complaint_id)
 
+    # Escalated or re-routed complaints are no longer in this queue
+    if not workflow.handles(current_user, c):
+        flash("This complaint is not assigned to you.", "warning")
+        return redirect(url_for('ao.ao_dashboard'))
+
     if c.status == "Resolved":
         flash("Already resolved!", "info")
         return redirect(url_for('ao.ao_dashboard'))
 
     if request.method == "POST":
 
-        upload_dir = current_app.config.get("UPLOAD_FOLDER", "uploads")
-        os.makedirs(upload_dir, exist_ok=True)
-
-        uploaded_files = request.files.getlist("final_files")
-        after_list = []
-
-        # SAVE FINAL AFTER FILES
-        for f in uploaded_files:
-            if f and f.filename:
-                ext = os.path.splitext(f.filename)[1]
-                fname = f"AFTER_{uuid.uuid4().hex}{ext}"
-                f.save(os.path.join(upload_dir, fname))
-                after_list.append(fname)
-
-        if after_list:
-            existing = c.after_files.split(",") if c.after_files else []
-            c.after_files = ",".join(existing + after_list)
-
-        c.status = "Resolved"
-
-        history = ComplaintHistory(
-            complaint_id=c.id,
-            action="Resolved by AO",
-            message="Final AFTER files submitted",
-            performed_by=current_user.name
-        )
+        files = [(f, "after") for f in request.files.getlist("final_files")]
 
-        db.session.add(history)
-        db.session.add(c)
-        db.session.commit()
+        try:
+            workflow.transition(c, "resolve", current_user.name, "Resolved by AO",
+                                message="Final AFTER files submitted", files=files)
+        except workflow.TransitionError as e:
+            flash(str(e), "warning")
+            return redirect(url_for('ao.ao_dashboard'))
 
         flash("Complaint marked as RESOLVED!", "success")
         return redirect(url_for('ao.ao_dashboard'))
@@ -1,7 +1,19 @@
 from flask import Flask, render_template
-from flask_login import LoginManager
-from extensions import db
-from models import User
+from extensions import db, migrate
+import query_counter
+import metrics
+import uploads
+import thumbnails
+import rollup
+import cache
+import outbox
+import duplicates
+import user_cache
+import db_routing
+import sqlite_profile
+import analytics
+import escalation
+import fragments
 import os
 
 # Import Blueprints
@@ -10,6 +22,10 @@ from student import student
 from hod import hod
 from ao import ao
 from principal import principal
+from notifications import notifications
+from search import search, rebuild_search_command
+from export import export
+from timeline import timeline
 
 import warden as warden_module
 warden = warden_module.warden
@@ -32,19 +48,68 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 # INITIALIZE DATABASE
 # -----------------------------------------
 db.init_app(app)
+sqlite_profile.init_app(app, db)
+migrate.init_app(app, db)
 
 
 # -----------------------------------------
-# LOGIN MANAGER
+# READ REPLICAS (read-your-writes after POST)
 # -----------------------------------------
-login_manager = LoginManager()
-login_manager.login_view = "auth.login"     # If not logged in → redirect to login
-login_manager.init_app(app)
+db_routing.init_app(app)
 
 
-@login_manager.user_loader
-def load_user(uid):
-    return User.query.get(int(uid))
+# -----------------------------------------
+# PER-REQUEST QUERY COUNTER / BUDGETS
+# -----------------------------------------
+query_counter.init_app(app)
+
+
+# -----------------------------------------
+# PROMETHEUS METRICS (/metrics)
+# -----------------------------------------
+metrics.init_app(app)
+
+
+# -----------------------------------------
+# STREAMING UPLOADS (size / type checks)
+# -----------------------------------------
+uploads.init_app(app)
+
+
+# -----------------------------------------
+# CACHE (unread counters)
+# -----------------------------------------
+cache.init_app(app)
+
+
+# -----------------------------------------
+# DASHBOARD FRAGMENT CACHE (versioned per scope)
+# -----------------------------------------
+fragments.init_app(app)
+
+
+# -----------------------------------------
+# OUTBOX DISPATCHER (staff notifications)
+# -----------------------------------------
+outbox.init_app(app)
+
+
+# -----------------------------------------
+# SLA ESCALATION SCHEDULER (overdue → principal)
+# -----------------------------------------
+escalation.init_app(app)
+
+
+# -----------------------------------------
+# LOGIN MANAGER (cached user loader)
+# -----------------------------------------
+user_cache.init_app(app)
+
+
+# -----------------------------------------
+# RESOLUTION-TIME ANALYTICS (template filter)
+# -----------------------------------------
+analytics.init_app(app)
 
 
 # -----------------------------------------
@@ -56,6 +121,23 @@ app.register_blueprint(hod, url_prefix="/hod")
 app.register_blueprint(ao, url_prefix="/ao")
 app.register_blueprint(principal, url_prefix="/principal")
 app.register_blueprint(warden, url_prefix="/warden")
+app.register_blueprint(notifications, url_prefix="/notifications")
+app.register_blueprint(search, url_prefix="/search")
+app.register_blueprint(export, url_prefix="/export")
+app.register_blueprint(timeline, url_prefix="/timeline")
+
+
+# -----------------------------------------
+# CLI COMMANDS
+# -----------------------------------------
+app.cli.add_command(rollup.rebuild_rollup_command)
+app.cli.add_command(thumbnails.backfill_thumbnails_command)
+app.cli.add_command(outbox.dispatch_outbox_command)
+app.cli.add_command(rebuild_search_command)
+app.cli.add_command(duplicates.prune_duplicates_command)
+app.cli.add_command(db_routing.sync_replicas_command)
+app.cli.add_command(analytics.refresh_analytics_command)
+app.cli.add_command(escalation.escalate_overdue_command)
 
 
 # -----------------------------------------
@@ -4,18 +4,55 @@ from models import User
 from extensions import db
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import login_user, logout_user, login_required, current_user
-from extensions import login_manager
+import user_cache
+import fragments
+import throttle
+import metrics
 from datetime import datetime
 
 auth = Blueprint('auth', __name__, template_folder='templates')
 
 
 # ============================================================
-# LOAD USER SESSION
+# PIN RULES (registration and HOD roster import)
 # ============================================================
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
+def validate_pin(pin, department):
+    """Raise ValueError unless pin looks like 23189-CS-020 and matches department."""
+    parts = pin.split('-')
+    if len(parts) != 3:
+        raise ValueError("PIN format must be 23189-CS-020")
+
+    yearcode = parts[0]
+    if len(yearcode) != 5:
+        raise ValueError("Invalid year/college code")
+
+    try:
+        year2 = int(yearcode[:2])
+    except ValueError:
+        raise ValueError("Invalid year/college code")
+    college = yearcode[2:]
+
+    if college != "189":
+        raise ValueError("College code must be 189")
+
+    year_full = 2000 + year2
+    if year_full > datetime.now().year:
+        raise ValueError("Future year not allowed")
+
+    dept_code = parts[1]
+    if dept_code not in ["CS", "EC"]:
+        raise ValueError("Department must be CS or EC")
+
+    roll = parts[2]
+    if not roll.isdigit() or len(roll) != 3:
+        raise ValueError("Roll must be 3 digits")
+
+    # Map PIN → Department
+    if dept_code == "CS" and department != "CSE":
+        raise ValueError("PIN dept CS → Must select CSE")
+
+    if dept_code == "EC" and department != "ECE":
+        raise ValueError("PIN dept EC → Must select ECE")
 
 
 # ============================================================
@@ -45,39 +82,7 @@ def register():
         # PIN VALIDATION
         # -------------------------------
         try:
-            parts = pin.split('-')
-            if len(parts) != 3:
-                raise ValueError("PIN format must be 23189-CS-020")
-
-            yearcode = parts[0]
-            if len(yearcode) != 5:
-                raise ValueError("Invalid year/college code")
-
-            year2 = int(yearcode[:2])
-            college = yearcode[2:]
-
-            if college != "189":
-                raise ValueError("College code must be 189")
-
-            year_full = 2000 + year2
-            if year_full > datetime.now().year:
-                raise ValueError("Future year not allowed")
-
-            dept_code = parts[1]
-            if dept_code not in ["CS", "EC"]:
-                raise ValueError("Department must be CS or EC")
-
-            roll = parts[2]
-            if not roll.isdigit() or len(roll) != 3:
-                raise ValueError("Roll must be 3 digits")
-
-            # Map PIN → Department
-            if dept_code == "CS" and department != "CSE":
-                raise ValueError("PIN dept CS → Must select CSE")
-
-            if dept_code == "EC" and department != "ECE":
-                raise ValueError("PIN dept EC → Must select ECE")
-
+            validate_pin(pin, department)
         except ValueError as e:
             flash(str(e), "danger")
             return redirect(url_for("auth.register"))
@@ -96,6 +101,7 @@ def register():
         )
 
         db.session.add(user)
+        fragments.students_changed(department)
         db.session.commit()
 
         flash("Registration successful! Awaiting HOD approval.", "success")
@@ -124,11 +130,19 @@ def login():
             flash("Enter login details.", "danger")
             return redirect(url_for("auth.login"))
 
+        # Throttle before any lookup or hash is spent on this attempt
+        wait = throttle.acquire(loginid, request.remote_addr)
+        if wait:
+            flash(f"Too many login attempts. Try again in {wait} seconds.", "danger")
+            return render_template("auth/login.html"), 429, {"Retry-After": str(wait)}
+
         # --------------------------------
         # STUDENT LOGIN (PIN)
         # --------------------------------
         if user_type == "student":
-            user = User.query.filter_by(pin=loginid, role="student").first()
+            # PINs are stored upper-case (register, roster import); SQLite
+            # compares case-sensitively, unlike MySQL's default collation
+            user = User.query.filter_by(pin=loginid.upper(), role="student").first()
 
             if not user:
                 flash("Invalid PIN.", "danger")
@@ -152,15 +166,19 @@ def login():
         # --------------------------------
         master_pass = current_app.config.get("MASTER_PASSWORD", None)
 
+        metrics.PASSWORD_HASHES.inc()
         valid_password = (
             check_password_hash(user.password, password)
             or (master_pass and password == master_pass)
         )
 
         if not valid_password:
+            throttle.failed(loginid)
             flash("Incorrect password.", "danger")
             return redirect(url_for("auth.login"))
 
+        throttle.succeeded(loginid)
+
         # Login
         login_user(user)
         session.permanent = False
@@ -202,16 +220,20 @@ def profile_page():
         email = request.form.get("email", "").strip().lower()
         password = request.form.get("password", "").strip()
 
+        # current_user is a cached snapshot; change the real row
+        user = User.query.get_or_404(current_user.id)
+
         if name:
-            current_user.name = name
+            user.name = name
 
         if email:
-            current_user.email = email
+            user.email = email
 
         if password:
-            current_user.password = generate_password_hash(password)
+            user.password = generate_password_hash(password)
 
         db.session.commit()
+        user_cache.invalidate(user.id)
 
         flash("Profile updated!", "success")
         return redirect(url_for("auth.profile_page"))
@@ -0,0 +1,151 @@
+# bench.py
+# Time the data access of every dashboard / view at growing complaint counts.
+#
+#   python bench.py --scales 1000,10000,100000 --out bench_results.json
+#
+# Uses DATABASE_URL when set, otherwise a throwaway SQLite file. The database
+# is grown in place from one scale to the next, so scales must be ascending.
+# The dashboard fragment cache is off unless FRAGMENT_CACHE is set, so the
+# timed requests run their queries instead of reusing the warm-up's HTML.
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("FRAGMENT_CACHE", "off")
+
+from app import app
+from extensions import db
+from models import Complaint, User
+from query_counter import count_queries
+import seed
+
+COMPLAINTS_PER_STUDENT = 20
+
+
+def _targets():
+    """(name, role, url) for every view worth timing, resolved against the current data."""
+    with app.app_context():
+        complaint, student = db.session.query(Complaint.id, Complaint.student_id)\
+            .filter_by(department="CSE").order_by(Complaint.id).first()
+        oldest = Complaint.query.order_by(Complaint.created_at.asc(), Complaint.id.asc()).first()
+
+        from pagination import encode_cursor
+        deep = encode_cursor(oldest)
+
+    return [
+        ("hod.hod_dashboard", ("hod", "CSE"), "/hod/dashboard"),
+        ("hod.view_complaint", ("hod", "CSE"), f"/hod/complaint/{complaint}"),
+        ("ao.ao_dashboard", ("ao", None), "/ao/dashboard"),
+        ("warden.warden_dashboard", ("warden", None), "/warden/dashboard"),
+        ("principal.principal_dashboard", ("principal", None), "/principal/dashboard"),
+        ("principal.all_complaints", ("principal", None), "/principal/all_complaints"),
+        ("principal.all_complaints[deep]", ("principal", None), f"/principal/all_complaints?after={deep}"),
+        ("student.my_complaints", student, "/student/my_complaints"),
+        ("student.complaint_view", student, f"/student/complaint/{complaint}"),
+    ]
+
+
+def _client(who):
+    with app.app_context():
+        if isinstance(who, int):
+            uid = who
+        else:
+            role, department = who
+            uid = User.query.filter_by(role=role, department=department).first().id
+
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s["_user_id"] = str(uid)
+        s["_fresh"] = True
+    return client
+
+
+def _time(client, url, repeat):
+    walls, sql_ms, statements = [], [], 0
+    status = None
+
+    client.get(url)  # warm caches / first-connect
+    for _ in range(repeat):
+        with count_queries() as counter:
+            started = time.perf_counter()
+            status = client.get(url).status_code
+            walls.append((time.perf_counter() - started) * 1000)
+        sql_ms.append(counter.seconds * 1000)
+        statements = counter.count
+
+    return {
+        "status": status,
+        "statements": statements,
+        "sql_ms_median": round(statistics.median(sql_ms), 3),
+        "wall_ms_median": round(statistics.median(walls), 3),
+        "wall_ms_max": round(max(walls), 3),
+    }
+
+
+def _commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard data access.")
+    parser.add_argument("--scales", default="1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="bench_results.json")
+    args = parser.parse_args()
+
+    scales = sorted(int(s) for s in args.scales.split(","))
+    rng = random.Random(args.seed)
+
+    app.config["QUERY_BUDGET_STRICT"] = False
+
+    results = {
+        "commit": _commit(),
+        "created": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "fragment_cache": app.config.get("FRAGMENT_CACHE"),
+        "scales": {},
+    }
+
+    with app.app_context():
+        db.create_all()
+        results["database"] = db.engine.dialect.name
+        seed.ensure_staff()
+
+    have = 0
+    for scale in scales:
+        with app.app_context():
+            students = User.query.filter_by(role="student").count()
+            want = max(50, scale // COMPLAINTS_PER_STUDENT)
+            if students < want:
+                seed.seed_students(want - students, rng)
+            seed.seed_complaints(scale - have, rng)
+        have = scale
+
+        rows = {}
+        for name, who, url in _targets():
+            rows[name] = _time(_client(who), url, args.repeat)
+            print(f"{scale:>7}  {name:<34} {rows[name]['statements']:>3} stmts  "
+                  f"sql {rows[name]['sql_ms_median']:>8.2f} ms  wall {rows[name]['wall_ms_median']:>8.2f} ms")
+        results["scales"][str(scale)] = rows
+
+    with open(args.out, "w") as fh:
+        json.dump(results, fh, indent=2)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# cache.py
+# Small key/value cache with pluggable backends.
+#
+# CACHE_URL unset: an in-process LRU. Each worker has its own copy, so
+# entries carry a TTL (CACHE_DEFAULT_TTL) to bound how stale another
+# worker's copy can get.
+# CACHE_URL=redis://host:6379/0: one Redis shared by every worker (needs the
+# `redis` package, imported only when configured).
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class LocalCache:
+    shared = False
+
+    def __init__(self, default_ttl=300, max_entries=10000):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()     # key → (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def _live(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] < now:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (ttl or self.default_ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def incr(self, key, delta=1):
+        """Add to a cached integer. Missing keys stay missing; returns the new value or None."""
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+            if entry is None:
+                return None
+            value = entry[1] + delta
+            self._data[key] = (entry[0], value)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class RedisCache:
+    shared = True
+
+    # INCRBY would create a missing key starting from 0
+    _INCR_EXISTING = """
+    if redis.call('exists', KEYS[1]) == 1 then
+        return redis.call('incrby', KEYS[1], ARGV[1])
+    end
+    return nil
+    """
+
+    def __init__(self, url, default_ttl=300, prefix="grievance:"):
+        import redis
+
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+        self._incr = self._redis.register_script(self._INCR_EXISTING)
+
+    def get(self, key):
+        raw = self._redis.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self._redis.set(self.prefix + key, json.dumps(value), ex=ttl or self.default_ttl)
+
+    def delete(self, *keys):
+        if keys:
+            self._redis.delete(*(self.prefix + k for k in keys))
+
+    def incr(self, key, delta=1):
+        return self._incr(keys=[self.prefix + key], args=[delta])
+
+    def clear(self):
+        for key in self._redis.scan_iter(self.prefix + "*"):
+            self._redis.delete(key)
+
+
+backend = LocalCache()
+
+
+def get(key):
+    return backend.get(key)
+
+
+def set(key, value, ttl=None):
+    backend.set(key, value, ttl)
+
+
+def delete(*keys):
+    backend.delete(*keys)
+
+
+def incr(key, delta=1):
+    return backend.incr(key, delta)
+
+
+def clear():
+    backend.clear()
+
+
+def shared():
+    """True when every worker sees the same entries (CACHE_URL is set)."""
+    return backend.shared
+
+
+def init_app(app):
+    global backend
+    ttl = app.config.get("CACHE_DEFAULT_TTL", 300)
+    url = app.config.get("CACHE_URL")
+
+    if url:
+        backend = RedisCache(url, default_ttl=ttl)
+    else:
+        backend = LocalCache(default_ttl=ttl,
+                             max_entries=app.config.get("CACHE_MAX_ENTRIES", 10000))
@@ -0,0 +1,157 @@
+# check_query_plans.py
+# Query-plan regression check for the dashboard list queries.
+#
+#   python check_query_plans.py
+#
+# Seeds a scratch SQLite database, requests every dashboard through the test
+# client (and runs one SLA scheduler tick), then runs EXPLAIN QUERY PLAN on
+# each statement issued. Pages are fetched with assert_query_budget in
+# strict mode, and every @query_budget view must be among them.
+# Exits 1 if any query scans a whole table or sorts the whole result, or if
+# a page runs more queries than its budget.
+import os
+import random
+import sys
+import tempfile
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "plans.db")
+
+from app import app
+from extensions import db
+import escalation
+from models import Complaint, ComplaintHistory, User
+from pagination import encode_cursor
+from query_counter import QueryBudgetExceeded, assert_query_budget, count_queries
+import seed
+
+# Small lookup tables read in full on purpose
+FULL_READ_OK = {"complaint_rollup"}
+
+# Budget-checked only: search ranks its FTS matches with bm25, which sorts
+# the matched rows by design
+PLAN_EXEMPT = {"/search/"}
+
+
+def _client(uid):
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s["_user_id"] = str(uid)
+        s["_fresh"] = True
+    return client
+
+
+def _pages():
+    with app.app_context():
+        staff = {(u.role, u.department): u.id for u in User.query.filter(User.role != "student")}
+        student = db.session.query(Complaint.student_id).first()[0]
+        middle = Complaint.query.order_by(Complaint.created_at).offset(
+            Complaint.query.count() // 2).first()
+        cursor = encode_cursor(middle)
+        busy = db.session.query(ComplaintHistory.complaint_id).group_by(
+            ComplaintHistory.complaint_id).order_by(db.func.count().desc()).first()[0]
+        owner = db.session.get(Complaint, busy).student_id
+
+    return [
+        (staff[("hod", "CSE")], "/hod/dashboard"),
+        (staff[("hod", "CSE")], f"/hod/dashboard?after={cursor}"),
+        (staff[("hod", "CSE")], "/hod/students"),
+        (staff[("ao", None)], "/ao/dashboard"),
+        (staff[("ao", None)], f"/ao/dashboard?before={cursor}"),
+        (staff[("warden", None)], "/warden/dashboard"),
+        (staff[("principal", None)], "/principal/dashboard"),
+        (staff[("principal", None)], "/principal/all_complaints"),
+        (staff[("principal", None)], f"/principal/all_complaints?after={cursor}"),
+        (staff[("principal", None)], f"/principal/all_complaints?before={cursor}"),
+        (staff[("principal", None)], "/principal/escalated"),
+        (student, "/student/my_complaints"),
+        (owner, f"/timeline/{busy}"),
+        (staff[("principal", None)], f"/timeline/{busy}/events?limit=1"),
+        (staff[("principal", None)], "/search/?q=water"),
+    ]
+
+
+def _problems(plan):
+    # Derived tables (e.g. the windowed timeline preview) are read in full by
+    # design; their own SELECT is checked as a separate plan row
+    derived = {row[-1].split()[1] for row in plan if row[-1].startswith("CO-ROUTINE")}
+    found = []
+    for row in plan:
+        detail = row[-1]
+        words = detail.split()
+        if (words[0] == "SCAN" and "USING" not in words
+                and words[1] not in FULL_READ_OK and words[1] not in derived):
+            found.append(detail)
+        if "TEMP B-TREE FOR ORDER BY" in detail:
+            found.append(detail)
+    return found
+
+
+def _check(label, counter):
+    failed = 0
+    with app.app_context():
+        for statement, params in zip(counter.statements, counter.parameters):
+            if not statement.lstrip().upper().startswith("SELECT"):
+                continue
+            plan = db.session.connection().exec_driver_sql(
+                "EXPLAIN QUERY PLAN " + statement, params
+            ).fetchall()
+            bad = _problems(plan)
+            if bad:
+                failed += 1
+                print(f"FAIL {label}\n  {statement.strip()}\n  " + "\n  ".join(bad))
+    return failed
+
+
+def _unchecked(urls):
+    """Budgeted views that none of the checked pages reach."""
+    adapter = app.url_map.bind("localhost")
+    reached = {adapter.match(url.split("?")[0])[0] for url in urls}
+    return sorted(endpoint for endpoint, view in app.view_functions.items()
+                  if hasattr(view, "query_budget") and endpoint not in reached)
+
+
+def main():
+    app.config["QUERY_BUDGET_STRICT"] = True
+    rng = random.Random(0)
+
+    with app.app_context():
+        db.create_all()
+        seed.seed_students(200, rng)
+        seed.seed_complaints(2000, rng)
+        db.session.execute(db.text("ANALYZE"))
+        db.session.commit()
+
+    pages = _pages()
+    failed = 0
+    for endpoint in _unchecked(url for _, url in pages):
+        failed += 1
+        print(f"FAIL {endpoint} has a query budget but no page here checks it")
+
+    for uid, url in pages:
+        with count_queries() as counter:
+            try:
+                status = assert_query_budget(_client(uid), url).status_code
+            except QueryBudgetExceeded as e:
+                failed += 1
+                print(f"FAIL {e}")
+                continue
+
+        if url.split("?")[0] not in PLAN_EXEMPT:
+            failed += _check(url, counter)
+        print(f"{'ok  ' if status == 200 else 'HTTP ' + str(status)} {url}")
+        if status != 200:
+            failed += 1
+
+    with app.app_context(), count_queries() as counter:
+        escalation.escalate_due()
+    failed += _check("escalate-overdue", counter)
+    print("ok   escalate-overdue tick")
+
+    if failed:
+        print(f"{failed} problem(s) found.")
+        sys.exit(1)
+    print("All dashboard queries use an index and stay within budget.")
+
+
+if __name__ == "__main__":
+    main()
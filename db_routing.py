@@ -0,0 +1,103 @@
+# db_routing.py
+# Read/write split: writes and flushes always use the primary bind, views
+# decorated with @read_replica send their SELECTs to one of the replica binds
+# (SQLALCHEMY_BINDS "replica1", "replica2", ... built from
+# DATABASE_REPLICA_URLS).
+#
+# After a user's own POST (or other write method, or a GET view marked
+# sqlite_profile.writes) the session cookie pins them to the primary for
+# DB_REPLICA_STICKY_SECONDS, so the redirect that follows shows what they
+# just wrote even if the replicas lag.
+import random
+import sqlite3
+import time
+from functools import wraps
+
+import click
+from flask import current_app, g, has_request_context, request, session
+from flask.cli import with_appcontext
+from flask_sqlalchemy.session import Session
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_PREFIX = "replica"
+STICKY_KEY = "_db_primary_until"
+
+
+def replica_keys(engines):
+    return sorted(k for k in engines if k and k.startswith(REPLICA_PREFIX))
+
+
+def _is_write(clause):
+    return isinstance(clause, UpdateBase) or getattr(clause, "_for_update_arg", None) is not None
+
+
+class RoutingSession(Session):
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not _is_write(clause):
+            replica = self._request_replica()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _request_replica(self):
+        if not has_request_context() or not g.get("read_replica"):
+            return None
+
+        engines = self._db.engines
+        key = g.get("replica_key")
+        if key is None:
+            keys = replica_keys(engines)
+            if not keys:
+                g.read_replica = False
+                return None
+            # One replica per request, so a page sees one consistent snapshot
+            key = g.replica_key = random.choice(keys)
+        return engines[key]
+
+
+def read_replica(view):
+    """Serve this (read-only) view's SELECTs from a replica when one is configured."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if session.get(STICKY_KEY, 0) <= time.time():
+            g.read_replica = True
+        return view(*args, **kwargs)
+    return wrapped
+
+
+@click.command("sync-replicas")
+@with_appcontext
+def sync_replicas_command():
+    """Copy a SQLite primary into SQLite replica files (local testing)."""
+    db = current_app.extensions["sqlalchemy"]
+    primary = make_url(current_app.config["SQLALCHEMY_DATABASE_URI"])
+    if primary.get_backend_name() != "sqlite":
+        raise click.ClickException("Only SQLite primaries can be copied; use real replication.")
+
+    source = sqlite3.connect(primary.database)
+    for key in replica_keys(db.engines):
+        url = db.engines[key].url
+        if url.get_backend_name() != "sqlite":
+            continue
+        db.engines[key].dispose()
+        target = sqlite3.connect(url.database)
+        source.backup(target)
+        target.close()
+        click.echo(f"{key}: copied {primary.database} → {url.database}")
+    source.close()
+
+
+def init_app(app):
+    sticky = app.config.get("DB_REPLICA_STICKY_SECONDS", 5)
+
+    @app.after_request
+    def _stick_to_primary(response):
+        if (
+            (request.method not in ("GET", "HEAD", "OPTIONS") or g.get("db_writes"))
+            and response.status_code < 400
+            and app.config.get("SQLALCHEMY_BINDS")
+        ):
+            session[STICKY_KEY] = time.time() + sticky
+        return response
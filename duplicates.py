@@ -0,0 +1,259 @@
+# duplicates.py
+# Near-duplicate detection for complaints about shared facilities.
+#
+# Each open complaint in a SHARED_CATEGORIES category gets a MinHash
+# signature of its title + description shingles. The signature is cut into
+# BANDS bands and each band is hashed into a bucket row (LSH), so finding
+# look-alikes is an indexed lookup of BANDS bucket keys: the cost depends on
+# how many complaints share a bucket, not on how many are open.
+#
+# A complaint close enough to an open one joins its cluster
+# (Complaint.cluster_id = the root's id). Staff dashboards list roots only
+# and a response to a root is copied to every member by propagate().
+import hashlib
+import random
+import re
+import struct
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, func, insert, update
+
+import outbox
+import rollup
+from extensions import db
+from models import Complaint, ComplaintHistory, ComplaintSignature, SignatureBucket
+
+# Facility problems many students report at once. Personal matters
+# (certificates, faculty conduct, ...) are never shown to other students.
+SHARED_CATEGORIES = {
+    "hostel_problem", "mess_food", "electricity_issues", "water_issues",
+    "hostel_cleanliness", "hostel_security", "room_maintenance",
+    "bathroom_plumbing", "noisy_environment",
+    "lab_issue", "department_infrastructure",
+}
+
+BANDS, ROWS = 20, 3             # 60 hash functions; ~50% recall at J=0.3, ~99% at J=0.6
+NUM_PERM = BANDS * ROWS
+SHINGLE = 4                     # character shingles
+_PRIME = (1 << 61) - 1
+
+_rng = random.Random(20261018)  # fixed: stored signatures must stay comparable
+PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "in", "on", "at", "of", "to",
+    "and", "or", "for", "with", "our", "my", "we", "i", "it", "this", "that",
+    "not", "no", "very", "please", "sir", "madam",
+}
+
+
+# ===================================================================
+# MINHASH / LSH
+# ===================================================================
+def shingles(text):
+    words = [w for w in re.findall(r"\w+", (text or "").lower()) if w not in STOPWORDS]
+    joined = " ".join(words)
+    if len(joined) <= SHINGLE:
+        return {joined} if joined else set()
+    return {joined[i:i + SHINGLE] for i in range(len(joined) - SHINGLE + 1)}
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "little")
+
+
+def minhash(text):
+    hashes = [_hash64(s) % _PRIME for s in shingles(text)]
+    if not hashes:
+        return None
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in PERMUTATIONS]
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of the two shingle sets."""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_PERM
+
+
+def _pack(sig):
+    return struct.pack(f"<{NUM_PERM}Q", *sig)
+
+
+def _unpack(raw):
+    return struct.unpack(f"<{NUM_PERM}Q", raw)
+
+
+def _scope(category, assigned_to, department):
+    # HOD complaints only cluster within one department
+    return f"{category}|{department if assigned_to == 'hod' else ''}"
+
+
+def buckets(sig, scope):
+    keys = []
+    for band in range(BANDS):
+        rows = sig[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(f"{scope}|{band}|{rows}".encode(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def _text(title, description):
+    return f"{title or ''} {description or ''}"
+
+
+# ===================================================================
+# LOOKUP
+# ===================================================================
+def find_similar(title, description, category, assigned_to, department,
+                 threshold=None, limit=5):
+    """[(root_id, similarity)] of open clusters this text looks like, best first."""
+    if category not in SHARED_CATEGORIES:
+        return []
+
+    sig = minhash(_text(title, description))
+    if sig is None:
+        return []
+
+    threshold = threshold or current_app.config.get("DUPLICATE_SUGGEST_THRESHOLD", 0.4)
+    return _lookup(sig, _scope(category, assigned_to, department), threshold, limit)
+
+
+def _lookup(sig, scope, threshold, limit):
+    cutoff = datetime.utcnow() - timedelta(days=current_app.config.get("DUPLICATE_WINDOW_DAYS", 14))
+
+    # Complaints sharing the most bands first; only these are compared
+    hits = func.count().label("hits")
+    candidates = (
+        db.session.query(SignatureBucket.complaint_id, hits)
+        .filter(SignatureBucket.bucket.in_(buckets(sig, scope)))
+        .group_by(SignatureBucket.complaint_id)
+        .order_by(hits.desc())
+        .limit(50)
+        .subquery()
+    )
+
+    query = (
+        db.session.query(Complaint.id, Complaint.cluster_id, ComplaintSignature.minhash)
+        .join(candidates, candidates.c.complaint_id == Complaint.id)
+        .join(ComplaintSignature, ComplaintSignature.complaint_id == Complaint.id)
+        .filter(Complaint.status != "Resolved", Complaint.created_at >= cutoff)
+    )
+
+    best = {}
+    for cid, cluster_id, raw in query:
+        score = similarity(sig, _unpack(raw))
+        if score < threshold:
+            continue
+        root = cluster_id or cid
+        best[root] = max(score, best.get(root, 0))
+
+    return sorted(best.items(), key=lambda item: -item[1])[:limit]
+
+
+def cluster_sizes(root_ids):
+    """{root_id: number of other complaints in its cluster} for one page."""
+    if not root_ids:
+        return {}
+    return dict(
+        db.session.query(Complaint.cluster_id, func.count(Complaint.id))
+        .filter(Complaint.cluster_id.in_(root_ids))
+        .group_by(Complaint.cluster_id)
+        .all()
+    )
+
+
+# ===================================================================
+# MAINTENANCE (called before the caller commits)
+# ===================================================================
+def index(complaint):
+    """Attach a new (flushed) complaint to a close cluster and index it."""
+    if complaint.category not in SHARED_CATEGORIES:
+        return
+
+    sig = minhash(_text(complaint.title, complaint.description))
+    if sig is None:
+        return
+
+    scope = _scope(complaint.category, complaint.assigned_to, complaint.department)
+
+    if complaint.cluster_id is None:
+        threshold = current_app.config.get("DUPLICATE_CLUSTER_THRESHOLD", 0.6)
+        matches = _lookup(sig, scope, threshold, limit=1)
+        if matches:
+            follow(complaint, db.session.get(Complaint, matches[0][0]))
+
+    db.session.add(ComplaintSignature(complaint_id=complaint.id, minhash=_pack(sig)))
+    db.session.execute(insert(SignatureBucket), [
+        {"bucket": key, "complaint_id": complaint.id} for key in buckets(sig, scope)
+    ])
+
+
+def follow(complaint, root):
+    """Make a new complaint part of root's cluster, at the root's stage."""
+    complaint.cluster_id = root.id
+    complaint.status = root.status
+    complaint.response = root.response
+    complaint.response_by = root.response_by
+
+
+def unindex(complaint_ids):
+    if not complaint_ids:
+        return
+    db.session.execute(delete(SignatureBucket).where(
+        SignatureBucket.complaint_id.in_(complaint_ids)))
+    db.session.execute(delete(ComplaintSignature).where(
+        ComplaintSignature.complaint_id.in_(complaint_ids)))
+
+
+def release(complaint):
+    """Before deleting a root: its members become roots of their own."""
+    db.session.execute(
+        update(Complaint)
+        .where(Complaint.cluster_id == complaint.id)
+        .values(cluster_id=None)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def propagate(root, performed_by):
+    """Copy a root's new status and response to the rest of its cluster."""
+    members = []
+    if root.cluster_id is None:
+        members = Complaint.query.filter(
+            Complaint.cluster_id == root.id,
+            Complaint.status.notin_([root.status, "Resolved"]),
+        ).all()
+
+    for c in members:
+        old_status = c.status
+        c.status = root.status
+        c.response = root.response
+        c.response_by = root.response_by
+        c.resolved_at = root.resolved_at
+        rollup.record_status_change(c, old_status)
+        outbox.enqueue("complaint_status", complaint_id=c.id, student_id=c.student_id,
+                       title=c.title, status=c.status)
+        db.session.add(ComplaintHistory(
+            complaint_id=c.id,
+            action=f"{root.status} with complaint #{root.id}",
+            message=root.response,
+            performed_by=performed_by,
+        ))
+
+    if root.status == "Resolved":
+        unindex([root.id] + [c.id for c in members])
+
+
+@click.command("prune-duplicates")
+@with_appcontext
+def prune_duplicates_command():
+    """Drop signatures of complaints older than DUPLICATE_WINDOW_DAYS."""
+    cutoff = datetime.utcnow() - timedelta(days=current_app.config.get("DUPLICATE_WINDOW_DAYS", 14))
+    old = [cid for (cid,) in db.session.query(ComplaintSignature.complaint_id)
+           .join(Complaint, Complaint.id == ComplaintSignature.complaint_id)
+           .filter(Complaint.created_at < cutoff)]
+    unindex(old)
+    db.session.commit()
+    click.echo(f"Pruned {len(old)} signatures.")
@@ -0,0 +1,212 @@
+# escalation.py
+# SLA escalation. A complaint gets a due_at deadline when it is filed
+# (student.sla_hours: per category, else per assigned staff role); answering
+# it clears the deadline. A complaint still Pending at its deadline is handed
+# to the principal: reassigned (with its duplicate cluster), a history entry
+# written and the principal and the original staff notified via the outbox.
+#
+# Due complaints come off ix_complaint_due_at (due_at <= now), so a tick
+# costs one index range read however many complaints are open. The claim is
+# a conditional UPDATE on (id, due_at, status), so any number of workers can
+# run the scheduler at once and each complaint is escalated exactly once.
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func, select, update
+
+import fragments
+import outbox
+import rollup
+from extensions import db
+from models import Complaint, ComplaintHistory
+from student import sla_hours
+
+log = logging.getLogger(__name__)
+
+ESCALATE_TO = "principal"
+ESCALATED_ACTION = "Escalated to Principal"
+PERFORMED_BY = "SLA scheduler"
+
+_scheduler_pid = None
+_scheduler_lock = threading.Lock()
+
+
+def due(now, limit):
+    """Complaints whose deadline has passed, oldest deadline first."""
+    return (
+        select(Complaint.id, Complaint.due_at, Complaint.assigned_to,
+               Complaint.department, Complaint.category, Complaint.title)
+        .where(Complaint.due_at <= now)
+        .order_by(Complaint.due_at)
+        .limit(limit)
+    )
+
+
+# ============================================================
+# ESCALATE
+# ============================================================
+def _escalate(row):
+    """Reassign one due complaint; False if it was answered or claimed meanwhile."""
+    claimed = db.session.execute(
+        update(Complaint)
+        .where(Complaint.id == row.id, Complaint.due_at == row.due_at,
+               Complaint.status == "Pending")
+        .values(assigned_to=ESCALATE_TO, due_at=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        # Answered by a path that left the deadline set: drop it so it is not read again
+        db.session.execute(
+            update(Complaint)
+            .where(Complaint.id == row.id, Complaint.due_at == row.due_at,
+                   Complaint.status != "Pending")
+            .values(due_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        return False
+
+    rollup.bump(row.department, row.category, "Pending", row.assigned_to, -1)
+    rollup.bump(row.department, row.category, "Pending", ESCALATE_TO, +1)
+    fragments.bump(ESCALATE_TO, fragments.scope_for(row.assigned_to, row.department))
+
+    # Open duplicates follow their root to the principal
+    members = db.session.execute(
+        select(Complaint.status, func.count(Complaint.id))
+        .where(Complaint.cluster_id == row.id, Complaint.status != "Resolved",
+               Complaint.assigned_to == row.assigned_to)
+        .group_by(Complaint.status)
+    ).all()
+    if members:
+        db.session.execute(
+            update(Complaint)
+            .where(Complaint.cluster_id == row.id, Complaint.status != "Resolved",
+                   Complaint.assigned_to == row.assigned_to)
+            .values(assigned_to=ESCALATE_TO)
+            .execution_options(synchronize_session=False)
+        )
+        for status, n in members:
+            rollup.bump(row.department, row.category, status, row.assigned_to, -n)
+            rollup.bump(row.department, row.category, status, ESCALATE_TO, +n)
+
+    db.session.add(ComplaintHistory(
+        complaint_id=row.id,
+        action=ESCALATED_ACTION,
+        message=f"No response from the {row.assigned_to.upper()} by "
+                f"{row.due_at:%Y-%m-%d %H:%M} UTC",
+        performed_by=PERFORMED_BY,
+    ))
+    outbox.enqueue(
+        "complaint_escalated",
+        complaint_id=row.id,
+        title=row.title,
+        escalated_from=row.assigned_to,
+        department=row.department,
+    )
+    return True
+
+
+def escalate_due(limit=None):
+    """Escalate one batch of overdue complaints. Returns how many were due."""
+    limit = limit or current_app.config.get("SLA_BATCH_SIZE", 100)
+    rows = db.session.execute(due(datetime.utcnow(), limit)).all()
+
+    escalated = sum(_escalate(row) for row in rows)
+    db.session.commit()
+
+    if escalated:
+        log.info("Escalated %s overdue complaint(s) to the principal", escalated)
+    return len(rows)
+
+
+def drain(app):
+    """Escalate batches until nothing is overdue."""
+    limit = app.config.get("SLA_BATCH_SIZE", 100)
+    with app.app_context():
+        while escalate_due(limit) == limit:
+            pass
+
+
+def backfill():
+    """Give Pending roots filed before deadlines existed their due_at."""
+    rows = db.session.execute(
+        select(Complaint.id, Complaint.category, Complaint.created_at)
+        .where(Complaint.status == "Pending", Complaint.due_at.is_(None),
+               Complaint.cluster_id.is_(None), Complaint.assigned_to != ESCALATE_TO)
+    ).all()
+    for cid, category, created_at in rows:
+        db.session.execute(
+            update(Complaint)
+            .where(Complaint.id == cid, Complaint.due_at.is_(None))
+            .values(due_at=(created_at or datetime.utcnow()) + timedelta(hours=sla_hours(category)))
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+    return len(rows)
+
+
+# ============================================================
+# BACKGROUND SCHEDULER
+# ============================================================
+def _run(app, interval):
+    while True:
+        try:
+            drain(app)
+        except Exception:
+            log.exception("SLA scheduler error")
+        threading.Event().wait(interval)
+
+
+def start_scheduler(app):
+    """Start this process's scheduler thread (once per pid, so forks get their own)."""
+    global _scheduler_pid
+    if _scheduler_pid == os.getpid():
+        return
+
+    with _scheduler_lock:
+        if _scheduler_pid == os.getpid():
+            return
+        _scheduler_pid = os.getpid()
+
+    threading.Thread(
+        target=_run,
+        args=(app, app.config.get("SLA_TICK_SECONDS", 60)),
+        name="sla-scheduler",
+        daemon=True,
+    ).start()
+
+
+@click.command("escalate-overdue")
+@click.option("--once", is_flag=True, help="Escalate what is overdue and exit.")
+@click.option("--backfill", "fill", is_flag=True,
+              help="First give older Pending complaints a deadline.")
+@with_appcontext
+def escalate_overdue_command(once, fill):
+    """Escalate complaints past their SLA (for SLA_SCHEDULER=off deployments)."""
+    app = current_app._get_current_object()
+
+    if fill:
+        click.echo(f"Set deadlines on {backfill()} complaint(s).")
+
+    if once:
+        drain(app)
+        waiting = db.session.scalar(
+            select(func.count(Complaint.id)).where(Complaint.due_at.is_not(None)))
+        click.echo(f"Overdue complaints escalated, {waiting} deadline(s) pending.")
+        return
+
+    click.echo("Escalating overdue complaints, Ctrl+C to stop.")
+    _run(app, app.config.get("SLA_TICK_SECONDS", 60))
+
+
+def init_app(app):
+    if app.config.get("SLA_SCHEDULER", "thread") != "thread":
+        return
+
+    @app.before_request
+    def _ensure_scheduler():
+        start_scheduler(app)
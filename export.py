@@ -0,0 +1,209 @@
+# export.py
+# CSV / XLSX export of complaints for the principal (everything) and the AO
+# (the AO queue), with the same filters as the dashboards could offer.
+#
+# Rows come from a server-side cursor (yield_per → stream_results) as plain
+# column tuples, student name / PIN joined in SQL, and leave as chunks of a
+# streamed response, so memory stays flat however many years are exported.
+# XLSX uses `openpyxl` (pinned in requirements.txt, imported only when asked
+# for; without it the form hides the Excel option). Its write-only workbook
+# spools rows to a temp file that is then streamed.
+import csv
+import io
+import tempfile
+from datetime import datetime, timedelta
+from functools import cache
+
+from flask import (Blueprint, Response, abort, current_app, flash, redirect,
+                   request, stream_with_context)
+from flask_login import current_user, login_required
+from sqlalchemy import select
+
+from db_routing import read_replica
+from extensions import db
+from models import Complaint, User
+from student import CATEGORIES
+
+export = Blueprint('export', __name__)
+
+EXPORT_ROLES = ("principal", "ao")
+STATUSES = ("Pending", "In Progress", "Resolved")
+DEPARTMENTS = ("CSE", "ECE")
+ASSIGNEES = ("hod", "warden", "ao")
+
+COLUMNS = [
+    ("ID", Complaint.id),
+    ("Created", Complaint.created_at),
+    ("Student", User.name),
+    ("PIN", User.pin),
+    ("Department", Complaint.department),
+    ("Category", Complaint.category),
+    ("Assigned To", Complaint.assigned_to),
+    ("Status", Complaint.status),
+    ("Title", Complaint.title),
+    ("Description", Complaint.description),
+    ("Response", Complaint.response),
+    ("Response By", Complaint.response_by),
+    ("Resolved", Complaint.resolved_at),
+    ("Duplicate Of", Complaint.cluster_id),
+]
+
+CHUNK_ROWS = 500
+CHUNK_BYTES = 64 * 1024
+
+# A cell starting with one of these is run as a formula by spreadsheets
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+# ===================================================================
+# QUERY
+# ===================================================================
+def _date(name):
+    value = request.args.get(name, "").strip()
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        abort(400, f"{name} must be YYYY-MM-DD")
+
+
+def _choice(name, allowed):
+    value = request.args.get(name, "").strip()
+    if value and value not in allowed:
+        abort(400, f"Unknown {name}: {value}")
+    return value or None
+
+
+def export_query(user):
+    """SELECT of COLUMNS for the filters in request.args, oldest first."""
+    stmt = select(*(col for _, col in COLUMNS)).join(User, User.id == Complaint.student_id)
+
+    start, end = _date("from"), _date("to")
+    if start:
+        stmt = stmt.where(Complaint.created_at >= start)
+    if end:
+        stmt = stmt.where(Complaint.created_at < end + timedelta(days=1))
+
+    filters = {
+        "department": _choice("department", DEPARTMENTS),
+        "category": _choice("category", CATEGORIES),
+        "status": _choice("status", STATUSES),
+        "assigned_to": _choice("assigned_to", ASSIGNEES),
+    }
+    if user.role == "ao":
+        filters["assigned_to"] = "ao"
+
+    for name, value in filters.items():
+        if value:
+            stmt = stmt.where(getattr(Complaint, name) == value)
+
+    return stmt.order_by(Complaint.created_at, Complaint.id)
+
+
+def _rows(stmt):
+    result = db.session.execute(
+        stmt.execution_options(yield_per=current_app.config.get("EXPORT_YIELD_PER", 1000))
+    )
+    try:
+        for row in result:
+            yield [_cell(value) for value in row]
+    finally:
+        result.close()
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+# ===================================================================
+# WRITERS
+# ===================================================================
+def _csv_chunks(rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    buf.write("\ufeff")     # Excel reads UTF-8 only with a BOM
+    writer.writerow([name for name, _ in COLUMNS])
+
+    for n, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if n % CHUNK_ROWS == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+@cache
+def _openpyxl():
+    """The openpyxl module, or None when it is not installed."""
+    try:
+        import openpyxl
+    except ImportError:
+        return None
+    return openpyxl
+
+
+def _xlsx_chunks(rows, openpyxl):
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Complaints")
+    sheet.append([name for name, _ in COLUMNS])
+    for row in rows:
+        sheet.append(row)
+
+    with tempfile.TemporaryFile() as spool:
+        workbook.save(spool)
+        spool.seek(0)
+        while chunk := spool.read(CHUNK_BYTES):
+            yield chunk
+
+
+# ===================================================================
+# ROUTE
+# ===================================================================
+@export.app_template_global()
+def export_choices():
+    """Filter options for templates/_export_form.html."""
+    return {
+        "departments": DEPARTMENTS,
+        "categories": sorted(CATEGORIES),
+        "statuses": STATUSES,
+        "assignees": ASSIGNEES,
+        "xlsx": _openpyxl() is not None,
+    }
+
+
+@export.route('/complaints')
+@login_required
+@read_replica
+def export_complaints():
+
+    if current_user.role not in EXPORT_ROLES:
+        flash("Access denied", "danger")
+        return redirect('/')
+
+    fmt = request.args.get("format", "csv")
+    stmt = export_query(current_user)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M")
+
+    if fmt == "xlsx":
+        openpyxl = _openpyxl()
+        if openpyxl is None:
+            abort(501, "XLSX export needs the openpyxl package; use CSV.")
+        body = _xlsx_chunks(_rows(stmt), openpyxl)
+        content_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    elif fmt == "csv":
+        body = _csv_chunks(_rows(stmt))
+        content_type = "text/csv; charset=utf-8"
+    else:
+        abort(400, "format must be csv or xlsx")
+
+    return Response(
+        stream_with_context(body),
+        content_type=content_type,
+        headers={"Content-Disposition": f'attachment; filename="complaints-{stamp}.{fmt}"'},
+    )
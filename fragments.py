@@ -0,0 +1,236 @@
+# fragments.py
+# Versioned fragment cache for the staff dashboards.
+#
+# A dashboard's {% block content %} is rendered once per (template, scope,
+# version, URL) and reused until the scope's version moves; the page around
+# it (menu, flash messages) is rendered on every request. Scopes are "hod:<dept>",
+# "ao", "warden" and "principal". Versions live in the fragment_version table
+# and are bumped by the handlers that change what a scope shows, in the same
+# transaction as the change (complaint_changed / students_changed /
+# student_changed), so a cached fragment is never stale and needs no TTL.
+# Old versions are simply never asked for again and age out of the LRU.
+#
+# FRAGMENT_CACHE selects the store: "memory" (per-process LRU capped at
+# FRAGMENT_CACHE_MAX_MB), "file" (one SQLite file per host shared by every
+# worker, same cap) or "off". Hits and misses are counted per role in
+# grievance_fragment_cache_total.
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, render_template, request
+from markupsafe import Markup
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+import metrics
+from extensions import db
+from models import FragmentVersion
+
+PRINCIPAL = "principal"
+
+
+# ============================================================
+# STORES
+# ============================================================
+class MemoryStore:
+    """Per-process LRU bounded by the memory its strings take."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()     # key → html
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            html = self._data.get(key)
+            if html is not None:
+                self._data.move_to_end(key)
+            return html
+
+    def set(self, key, html):
+        cost = sys.getsizeof(html)
+        if cost > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= sys.getsizeof(old)
+            self._data[key] = html
+            self.size += cost
+            while self.size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.size -= sys.getsizeof(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+
+class FileStore:
+    """LRU in a SQLite file, shared by every worker process on the host."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS fragment (
+        key TEXT PRIMARY KEY,
+        html TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        used REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS ix_fragment_used ON fragment (used);
+    """
+    TOUCH_SECONDS = 30      # refresh "used" at most this often per entry
+    PRUNE_EVERY = 50        # writes between size checks (per process)
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=2, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key):
+        conn = self._conn()
+        row = conn.execute("SELECT html, used FROM fragment WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[1] > self.TOUCH_SECONDS:
+            conn.execute("UPDATE fragment SET used = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key, html):
+        size = len(html.encode())
+        if size > self.max_bytes:
+            return
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO fragment (key, html, size, used) VALUES (?, ?, ?, ?)",
+                     (key, html, size, time.time()))
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self._prune(conn)
+
+    def _prune(self, conn):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM fragment").fetchone()[0]
+            for key, size in conn.execute("SELECT key, size FROM fragment ORDER BY used").fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM fragment WHERE key = ?", (key,))
+                total -= size
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        self._conn().execute("DELETE FROM fragment")
+
+
+store = None
+
+
+# ============================================================
+# VERSIONS (called before the caller commits)
+# ============================================================
+def scope_for(assigned_to, department):
+    """The dashboard that lists complaints assigned this way."""
+    return f"hod:{department}" if assigned_to == "hod" else assigned_to
+
+
+def bump(*scopes):
+    # Sorted, so concurrent writers lock version rows in the same order
+    for scope in sorted({s for s in scopes if s}):
+        stmt = (
+            update(FragmentVersion)
+            .where(FragmentVersion.scope == scope)
+            .values(version=FragmentVersion.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if db.session.execute(stmt).rowcount:
+            continue
+        try:
+            with db.session.begin_nested():
+                db.session.add(FragmentVersion(scope=scope, version=1))
+        except IntegrityError:
+            # Another transaction created the row first
+            db.session.execute(stmt)
+
+
+def complaint_changed(*complaints):
+    """A complaint was filed, answered, moved or deleted."""
+    bump(PRINCIPAL, *(scope_for(c.assigned_to, c.department) for c in complaints))
+
+
+def students_changed(department):
+    """A registration was added, approved or declined, or the roster changed."""
+    bump(PRINCIPAL, f"hod:{department}")
+
+
+def student_changed(student):
+    """A student's details changed: every list that shows their complaints."""
+    bump(PRINCIPAL, f"hod:{student.department}", "ao", "warden")
+
+
+def version(scope):
+    return db.session.scalar(
+        select(FragmentVersion.version).where(FragmentVersion.scope == scope)) or 0
+
+
+# ============================================================
+# RENDERING
+# ============================================================
+def _render_content(template_name, context):
+    template = current_app.jinja_env.get_or_select_template(template_name)
+    current_app.update_template_context(context)
+    return "".join(template.blocks["content"](template.new_context(context)))
+
+
+def render(template_name, scope, context, vary=None):
+    """render_template(template_name, **context()), reusing the content block
+    while `scope` keeps its version. `context` is only called on a miss;
+    `vary` separates users whose copy differs (e.g. a greeting)."""
+    if store is None:
+        return render_template(template_name, **context())
+
+    role = scope.split(":")[0]
+    key = f"{template_name}|{scope}|{vary or ''}|{version(scope)}|{request.full_path}"
+
+    html = store.get(key)
+    if html is None:
+        metrics.FRAGMENT_CACHE.labels(role=role, result="miss").inc()
+        html = _render_content(template_name, context())
+        store.set(key, html)
+    else:
+        metrics.FRAGMENT_CACHE.labels(role=role, result="hit").inc()
+
+    return render_template("_fragment.html", fragment=Markup(html))
+
+
+def init_app(app):
+    global store
+    kind = app.config.get("FRAGMENT_CACHE", "memory")
+    max_bytes = int(app.config.get("FRAGMENT_CACHE_MAX_MB", 64) * 1024 * 1024)
+
+    if kind == "memory":
+        store = MemoryStore(max_bytes)
+    elif kind == "file":
+        store = FileStore(app.config["FRAGMENT_CACHE_PATH"], max_bytes)
+    else:
+        store = None
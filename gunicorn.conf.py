@@ -0,0 +1,29 @@
+# gunicorn.conf.py
+# Shared Prometheus directory so /metrics aggregates every worker.
+import os
+import shutil
+
+metrics_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/grievance_portal_metrics")
+
+
+def on_starting(server):
+    # Samples from a previous run would be summed into the new one
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+# Threaded workers for ordinary requests. Notification streams are not served
+# from here: each one would hold a thread for NOTIFY_STREAM_SECONDS. With
+# NOTIFY_TRANSPORT=sse, run a second gunicorn on async workers (pip install
+# gevent) with its own metrics directory, and have the proxy send
+# /notifications/stream to it:
+#
+#   GUNICORN_WORKER_CLASS=gevent PROMETHEUS_MULTIPROC_DIR=/tmp/grievance_portal_stream_metrics \
+#       gunicorn -c gunicorn.conf.py -b 127.0.0.1:8001 app:app
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
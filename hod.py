@@ -2,8 +2,21 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_required, current_user
 from extensions import db
-from models import User, Complaint, ComplaintHistory
-import os, uuid
+from models import User, Complaint, RosterEntry
+from query_counter import query_budget
+from db_routing import read_replica
+from sqlite_profile import writes
+from pagination import keyset_paginate
+import rollup
+import duplicates
+import fragments
+import user_cache
+import workflow
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import joinedload
+from timeline import latest_events
+from uploads import raw_files
+import roster
 
 hod = Blueprint('hod', __name__, template_folder='templates/hod')
 
@@ -13,36 +26,72 @@ hod = Blueprint('hod', __name__, template_folder='templates/hod')
 # ---------------------------------------------------------
 @hod.route('/dashboard')
 @login_required
+@query_budget(7)
+@read_replica
 def hod_dashboard():
 
     if current_user.role != "hod":
         flash("Access denied", "danger")
         return redirect('/')
 
-    complaints = Complaint.query.filter_by(
-        assigned_to='hod',
-        department=current_user.department
-    ).order_by(Complaint.created_at.desc()).all()
+    def page():
+        complaints = keyset_paginate(
+            Complaint.query.options(
+                joinedload(Complaint.student)
+            ).filter_by(
+                assigned_to='hod',
+                department=current_user.department,
+                cluster_id=None
+            )
+        )
 
-    pending_students = User.query.filter_by(
-        role='student',
-        department=current_user.department,
-        approved=False
-    ).all()
+        # (student, on_roster) pairs; approved students have their own
+        # paged list (hod.approved_students) so they are not loaded here
+        pending_students = db.session.query(
+            User, RosterEntry.pin.isnot(None)
+        ).outerjoin(
+            RosterEntry, RosterEntry.pin == User.pin
+        ).filter(
+            User.role == 'student',
+            User.department == current_user.department,
+            User.approved == False
+        ).order_by(User.created_at).all()
+
+        return dict(
+            complaints=complaints,
+            cluster_sizes=duplicates.cluster_sizes([c.id for c in complaints]),
+            timelines=latest_events([c.id for c in complaints]),
+            pending_students=pending_students
+        )
 
-    approved_students = User.query.filter_by(
-        role='student',
-        department=current_user.department,
-        approved=True
-    ).all()
+    # Re-rendered only after the department's complaints or students change
+    return fragments.render("hod/dashboard.html", f"hod:{current_user.department}", page)
 
-    return render_template(
-        "hod/dashboard.html",
-        complaints=complaints,
-        pending_students=pending_students,
-        approved_students=approved_students
+
+# ---------------------------------------------------------
+# APPROVED STUDENTS (paged, newest registrations first)
+# ---------------------------------------------------------
+@hod.route('/students')
+@login_required
+@query_budget(2)
+@read_replica
+def approved_students():
+
+    if current_user.role != "hod":
+        flash("Access denied", "danger")
+        return redirect('/')
+
+    students = keyset_paginate(
+        User.query.filter_by(
+            role='student',
+            department=current_user.department,
+            approved=True
+        ),
+        model=User
     )
 
+    return render_template("hod/students.html", students=students)
+
 
 # ---------------------------------------------------------
 # VIEW COMPLAINT (HOD) ✅ NEW
@@ -80,7 +129,16 @@ def respond(complaint_id):
 
     c = Complaint.query.get_or_404(complaint_id)
 
-    if c.response:
+    # Escalated complaints and other departments' complaints are not ours
+    if not workflow.handles(current_user, c):
+        flash("This complaint is not assigned to you.", "warning")
+        return redirect(url_for('hod.hod_dashboard'))
+
+    if c.status == "Resolved":
+        flash("Complaint already resolved.", "info")
+        return redirect(url_for('hod.hod_dashboard'))
+
+    if c.status == "In Progress":
         return redirect(url_for('hod.resolve_complaint', complaint_id=c.id))
 
     if request.method == "POST":
@@ -93,43 +151,17 @@ def respond(complaint_id):
             flash("Response cannot be empty!", "danger")
             return redirect(url_for('hod.respond', complaint_id=c.id))
 
-        upload_dir = current_app.config["UPLOAD_FOLDER"]
-        os.makedirs(upload_dir, exist_ok=True)
-
-        # BEFORE FILES
-        for f in before_files:
-            if f.filename:
-                ext = os.path.splitext(f.filename)[1]
-                new_name = f"BEFORE_{uuid.uuid4().hex}{ext}"
-                f.save(os.path.join(upload_dir, new_name))
-                c.before_files = ",".join(
-                    filter(None, [c.before_files, new_name])
-                )
-
-        # AFTER FILES
-        for f in after_files:
-            if f.filename:
-                ext = os.path.splitext(f.filename)[1]
-                new_name = f"AFTER_{uuid.uuid4().hex}{ext}"
-                f.save(os.path.join(upload_dir, new_name))
-                c.after_files = ",".join(
-                    filter(None, [c.after_files, new_name])
-                )
-
-        c.status = "Resolved" if any(f.filename for f in after_files) else "In Progress"
-        c.response = response_text
-        c.response_by = current_user.name
-
-        db.session.add(
-            ComplaintHistory(
-                complaint_id=c.id,
-                action="Responded by HOD",
-                message=response_text,
-                performed_by=current_user.name
-            )
-        )
+        # AFTER photos with the response close the complaint in one step
+        action = "respond_and_resolve" if any(f.filename for f in after_files) else "respond"
+        files = [(f, "before") for f in before_files] + [(f, "after") for f in after_files]
+
+        try:
+            workflow.transition(c, action, current_user.name, "Responded by HOD",
+                                response=response_text, files=files)
+        except workflow.TransitionError as e:
+            flash(str(e), "warning")
+            return redirect(url_for('hod.hod_dashboard'))
 
-        db.session.commit()
         flash("Response submitted!", "success")
         return redirect(url_for('hod.hod_dashboard'))
 
@@ -149,38 +181,25 @@ def resolve_complaint(complaint_id):
 
     c = Complaint.query.get_or_404(complaint_id)
 
+    if not workflow.handles(current_user, c):
+        flash("This complaint is not assigned to you.", "warning")
+        return redirect(url_for('hod.hod_dashboard'))
+
     if c.status == "Resolved":
         flash("Complaint already resolved.", "info")
         return redirect(url_for('hod.hod_dashboard'))
 
     if request.method == "POST":
 
-        upload_dir = current_app.config["UPLOAD_FOLDER"]
-        os.makedirs(upload_dir, exist_ok=True)
-
-        after_files = request.files.getlist("final_files")
+        files = [(f, "after") for f in request.files.getlist("final_files")]
 
-        for f in after_files:
-            if f.filename:
-                ext = os.path.splitext(f.filename)[1]
-                new_name = f"AFTER_{uuid.uuid4().hex}{ext}"
-                f.save(os.path.join(upload_dir, new_name))
-                c.after_files = ",".join(
-                    filter(None, [c.after_files, new_name])
-                )
+        try:
+            workflow.transition(c, "resolve", current_user.name, "Marked Resolved by HOD",
+                                message="Final AFTER photos submitted", files=files)
+        except workflow.TransitionError as e:
+            flash(str(e), "warning")
+            return redirect(url_for('hod.hod_dashboard'))
 
-        c.status = "Resolved"
-
-        db.session.add(
-            ComplaintHistory(
-                complaint_id=c.id,
-                action="Marked Resolved by HOD",
-                message="Final AFTER photos submitted",
-                performed_by=current_user.name
-            )
-        )
-
-        db.session.commit()
         flash("Complaint marked as Resolved!", "success")
         return redirect(url_for('hod.hod_dashboard'))
 
@@ -191,6 +210,7 @@ def resolve_complaint(complaint_id):
 # APPROVE STUDENT
 # ---------------------------------------------------------
 @hod.route('/approve_student/<int:student_id>')
+@writes
 @login_required
 def approve_student(student_id):
 
@@ -205,7 +225,9 @@ def approve_student(student_id):
         return redirect(url_for('hod.hod_dashboard'))
 
     student.approved = True
+    fragments.students_changed(student.department)
     db.session.commit()
+    user_cache.invalidate(student.id)
 
     flash(f"{student.name} approved successfully!", "success")
     return redirect(url_for('hod.hod_dashboard'))
@@ -215,6 +237,7 @@ def approve_student(student_id):
 # DECLINE STUDENT
 # ---------------------------------------------------------
 @hod.route('/decline_student/<int:student_id>')
+@writes
 @login_required
 def decline_student(student_id):
 
@@ -228,8 +251,90 @@ def decline_student(student_id):
         flash("Unauthorized action!", "danger")
         return redirect(url_for('hod.hod_dashboard'))
 
+    for c in student.complaints:
+        rollup.record_deleted(c)
+        duplicates.release(c)
+
+    fragments.student_changed(student)
     db.session.delete(student)
     db.session.commit()
+    user_cache.invalidate(student_id)
 
     flash("Student declined and removed!", "info")
-    return redirect(url_for('hod.hod_dashboard'))
\ No newline at end of file
+    return redirect(url_for('hod.hod_dashboard'))
+
+
+# ---------------------------------------------------------
+# BULK APPROVE / DECLINE (pending students only)
+# ---------------------------------------------------------
+@hod.route('/students/bulk', methods=['POST'])
+@login_required
+def bulk_students():
+
+    if current_user.role != "hod":
+        flash("Access denied", "danger")
+        return redirect('/')
+
+    action = request.form.get("action")
+    if action not in ("approve", "decline"):
+        flash("Unknown action.", "danger")
+        return redirect(url_for('hod.hod_dashboard'))
+
+    if request.form.get("scope") == "roster" and action == "approve":
+        target = User.pin.in_(
+            select(RosterEntry.pin).filter_by(department=current_user.department)
+        )
+    else:
+        ids = request.form.getlist("student_ids", type=int)
+        if not ids:
+            flash("Select at least one student.", "warning")
+            return redirect(url_for('hod.hod_dashboard'))
+        target = User.id.in_(ids)
+
+    # Pending students cannot log in: no complaints to unwind from the
+    # rollup and no cached user snapshots to invalidate.
+    stmt = update(User).values(approved=True) if action == "approve" else delete(User)
+    count = db.session.execute(
+        stmt.filter_by(
+            role='student',
+            department=current_user.department,
+            approved=False
+        ).where(target).execution_options(synchronize_session=False)
+    ).rowcount
+    fragments.students_changed(current_user.department)
+    db.session.commit()
+
+    if action == "approve":
+        flash(f"{count} student(s) approved.", "success")
+    else:
+        flash(f"{count} student(s) declined and removed.", "info")
+    return redirect(url_for('hod.hod_dashboard'))
+
+
+# ---------------------------------------------------------
+# ROSTER IMPORT (CSV: pin, name, email)
+# ---------------------------------------------------------
+@hod.route('/students/import', methods=['GET', 'POST'])
+@raw_files
+@login_required
+def import_roster():
+
+    if current_user.role != "hod":
+        flash("Access denied", "danger")
+        return redirect('/')
+
+    result = None
+    if request.method == "POST":
+        f = request.files.get("roster")
+        if not f or not f.filename:
+            flash("Choose a CSV file.", "danger")
+            return redirect(url_for('hod.import_roster'))
+
+        result = roster.import_csv(f.stream, current_user.department)
+
+        # "On roster" badges on the dashboard
+        if result.inserted:
+            fragments.students_changed(current_user.department)
+            db.session.commit()
+
+    return render_template("hod/import_roster.html", result=result)
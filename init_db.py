@@ -1,6 +1,22 @@
+import os
+
+from flask_migrate import stamp
+from sqlalchemy import text
+
 from app import app
 from extensions import db
 
 with app.app_context():
+    if db.engine.dialect.name == "sqlite":
+        path = db.engine.url.database
+        if path and path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
     db.create_all()
+    # Tables came from the models, so later `flask db upgrade` starts from here
+    stamp()
+
+    if db.engine.dialect.name == "sqlite":
+        mode = db.session.execute(text("PRAGMA journal_mode")).scalar()
+        print(f"SQLite database at {db.engine.url.database} (journal_mode={mode})")
     print("Database initialized successfully!")
@@ -0,0 +1,125 @@
+# metrics.py
+# Prometheus metrics: per-endpoint latency, SQL per request, uploads, status codes,
+# outbox delivery, user cache hits, login throttling.
+#
+# Under gunicorn set PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py does) so every
+# worker writes its samples to a shared directory and /metrics aggregates them.
+import os
+import time
+
+from flask import Response, abort, current_app, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+    generate_latest, multiprocess,
+)
+
+from query_counter import current_counter
+
+REQUEST_LATENCY = Histogram(
+    "grievance_request_duration_seconds",
+    "Request latency by endpoint",
+    ["endpoint", "method"],
+)
+
+RESPONSES = Counter(
+    "grievance_responses_total",
+    "Responses by endpoint and status code",
+    ["endpoint", "status"],
+)
+
+SQL_STATEMENTS = Histogram(
+    "grievance_request_sql_statements",
+    "SQL statements executed per request",
+    ["endpoint"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, float("inf")),
+)
+
+SQL_SECONDS = Histogram(
+    "grievance_request_sql_seconds",
+    "Time spent in SQL per request",
+    ["endpoint"],
+)
+
+UPLOAD_BYTES = Counter(
+    "grievance_upload_bytes_total",
+    "Bytes of attachments written to disk (duplicates write nothing)",
+    ["kind"],
+)
+
+UPLOAD_REJECTED = Counter(
+    "grievance_upload_rejected_total",
+    "Uploads refused while streaming",
+    ["reason"],
+)
+
+OUTBOX_EVENTS = Counter(
+    "grievance_outbox_events_total",
+    "Outbox events handled by the dispatcher",
+    ["kind", "outcome"],
+)
+
+USER_CACHE = Counter(
+    "grievance_user_cache_total",
+    "Flask-Login user lookups served from the per-process cache or the database",
+    ["result"],
+)
+
+FRAGMENT_CACHE = Counter(
+    "grievance_fragment_cache_total",
+    "Dashboard content blocks served from the fragment cache or re-rendered",
+    ["role", "result"],
+)
+
+LOGIN_THROTTLED = Counter(
+    "grievance_login_throttled_total",
+    "Login attempts refused before hashing (= password hashes saved)",
+    ["reason"],
+)
+
+PASSWORD_HASHES = Counter(
+    "grievance_login_password_checks_total",
+    "Password hashes computed by auth.login",
+)
+
+
+def _registry():
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def metrics_view():
+    token = current_app.config.get("METRICS_TOKEN")
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        abort(403)
+    return Response(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+def init_app(app):
+
+    @app.before_request
+    def _start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _observe(response):
+        started = g.pop("request_started", None)
+        if started is None:
+            return response
+
+        # Unmatched URLs share one label so 404 scans can't blow up cardinality
+        endpoint = request.endpoint or "unmatched"
+
+        REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - started)
+        RESPONSES.labels(endpoint, str(response.status_code)).inc()
+
+        counter = current_counter()
+        if counter is not None:
+            SQL_STATEMENTS.labels(endpoint).observe(counter.count)
+            SQL_SECONDS.labels(endpoint).observe(counter.seconds)
+
+        return response
+
+    app.add_url_rule("/metrics", "metrics", metrics_view)
@@ -0,0 +1,121 @@
+"""attachment table
+
+Moves the comma-joined complaint.attachment / before_files / after_files
+strings into one row per file.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+"""
+import mimetypes
+import os
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+from flask import current_app
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# old column → Attachment.kind
+COLUMNS = {
+    'attachment': 'student',
+    'before_files': 'before',
+    'after_files': 'after',
+}
+
+complaint = sa.table(
+    'complaint',
+    sa.column('id', sa.Integer),
+    sa.column('created_at', sa.DateTime),
+    *(sa.column(name, sa.Text) for name in COLUMNS)
+)
+
+attachment = sa.table(
+    'attachment',
+    sa.column('id', sa.Integer),
+    sa.column('complaint_id', sa.Integer),
+    sa.column('kind', sa.String),
+    sa.column('stored_name', sa.String),
+    sa.column('size', sa.Integer),
+    sa.column('mime_type', sa.String),
+    sa.column('created_at', sa.DateTime),
+)
+
+
+def _size(name):
+    try:
+        return os.path.getsize(os.path.join(current_app.config['UPLOAD_FOLDER'], name))
+    except OSError:
+        return None
+
+
+def upgrade():
+    op.create_table('attachment',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('complaint_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('stored_name', sa.String(length=255), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=True),
+    sa.Column('mime_type', sa.String(length=100), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['complaint_id'], ['complaint.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('attachment', schema=None) as batch_op:
+        batch_op.create_index('ix_attachment_complaint_kind', ['complaint_id', 'kind'], unique=False)
+
+    bind = op.get_bind()
+    rows = []
+    for c in bind.execute(sa.select(complaint).order_by(complaint.c.id)):
+        for column, kind in COLUMNS.items():
+            for name in filter(None, (n.strip() for n in (getattr(c, column) or '').split(','))):
+                rows.append(dict(
+                    complaint_id=c.id,
+                    kind=kind,
+                    stored_name=name,
+                    size=_size(name),
+                    mime_type=mimetypes.guess_type(name)[0],
+                    created_at=c.created_at or datetime.utcnow(),
+                ))
+        if len(rows) >= 1000:
+            op.bulk_insert(attachment, rows)
+            rows = []
+    if rows:
+        op.bulk_insert(attachment, rows)
+
+    with op.batch_alter_table('complaint', schema=None) as batch_op:
+        for column in COLUMNS:
+            batch_op.drop_column(column)
+
+
+def downgrade():
+    with op.batch_alter_table('complaint', schema=None) as batch_op:
+        for column in COLUMNS:
+            batch_op.add_column(sa.Column(column, sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    joined = {}
+    for a in bind.execute(sa.select(attachment.c.complaint_id, attachment.c.kind,
+                                    attachment.c.stored_name)
+                          .order_by(attachment.c.id)):
+        joined.setdefault((a.complaint_id, a.kind), []).append(a.stored_name)
+
+    kinds = {kind: column for column, kind in COLUMNS.items()}
+    for (complaint_id, kind), names in joined.items():
+        bind.execute(
+            complaint.update()
+            .where(complaint.c.id == complaint_id)
+            .values({kinds[kind]: ','.join(names)})
+        )
+
+    with op.batch_alter_table('attachment', schema=None) as batch_op:
+        batch_op.drop_index('ix_attachment_complaint_kind')
+
+    op.drop_table('attachment')
@@ -0,0 +1,68 @@
+"""complaint full-text search
+
+SQLite gets an external-content FTS5 table kept current by triggers,
+MySQL a FULLTEXT index on the complaint table.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+SQLITE_UPGRADE = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS complaint_fts USING fts5(
+        title, description, response,
+        content='complaint', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS complaint_fts_ai AFTER INSERT ON complaint BEGIN
+        INSERT INTO complaint_fts(rowid, title, description, response)
+        VALUES (new.id, new.title, new.description, new.response);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS complaint_fts_ad AFTER DELETE ON complaint BEGIN
+        INSERT INTO complaint_fts(complaint_fts, rowid, title, description, response)
+        VALUES ('delete', old.id, old.title, old.description, old.response);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS complaint_fts_au
+    AFTER UPDATE OF title, description, response ON complaint BEGIN
+        INSERT INTO complaint_fts(complaint_fts, rowid, title, description, response)
+        VALUES ('delete', old.id, old.title, old.description, old.response);
+        INSERT INTO complaint_fts(rowid, title, description, response)
+        VALUES (new.id, new.title, new.description, new.response);
+    END""",
+    "INSERT INTO complaint_fts(complaint_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS complaint_fts_au",
+    "DROP TRIGGER IF EXISTS complaint_fts_ad",
+    "DROP TRIGGER IF EXISTS complaint_fts_ai",
+    "DROP TABLE IF EXISTS complaint_fts",
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+        return
+
+    op.create_index('ix_complaint_fulltext', 'complaint',
+                    ['title', 'description', 'response'], mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+        return
+
+    op.drop_index('ix_complaint_fulltext', table_name='complaint')
@@ -0,0 +1,80 @@
+"""near-duplicate clusters
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+SEARCH_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS complaint_fts_ai AFTER INSERT ON complaint BEGIN
+        INSERT INTO complaint_fts(rowid, title, description, response)
+        VALUES (new.id, new.title, new.description, new.response);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS complaint_fts_ad AFTER DELETE ON complaint BEGIN
+        INSERT INTO complaint_fts(complaint_fts, rowid, title, description, response)
+        VALUES ('delete', old.id, old.title, old.description, old.response);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS complaint_fts_au
+    AFTER UPDATE OF title, description, response ON complaint BEGIN
+        INSERT INTO complaint_fts(complaint_fts, rowid, title, description, response)
+        VALUES ('delete', old.id, old.title, old.description, old.response);
+        INSERT INTO complaint_fts(rowid, title, description, response)
+        VALUES (new.id, new.title, new.description, new.response);
+    END""",
+]
+
+
+def upgrade():
+    with op.batch_alter_table('complaint', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cluster_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_complaint_cluster_id'), ['cluster_id'], unique=False)
+        batch_op.create_foreign_key('fk_complaint_cluster_id', 'complaint',
+                                    ['cluster_id'], ['id'], ondelete='SET NULL')
+    _restore_search_triggers()
+
+    op.create_table('complaint_signature',
+    sa.Column('complaint_id', sa.Integer(), nullable=False),
+    sa.Column('minhash', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['complaint_id'], ['complaint.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('complaint_id')
+    )
+    op.create_table('signature_bucket',
+    sa.Column('bucket', sa.BigInteger(), autoincrement=False, nullable=False),
+    sa.Column('complaint_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['complaint_id'], ['complaint.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('bucket', 'complaint_id')
+    )
+    with op.batch_alter_table('signature_bucket', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_signature_bucket_complaint_id'), ['complaint_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('signature_bucket', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_signature_bucket_complaint_id'))
+
+    op.drop_table('signature_bucket')
+    op.drop_table('complaint_signature')
+
+    with op.batch_alter_table('complaint', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_complaint_cluster_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_complaint_cluster_id'))
+        batch_op.drop_column('cluster_id')
+    _restore_search_triggers()
+
+
+def _restore_search_triggers():
+    # SQLite batch mode rebuilds complaint, dropping the 0006 FTS triggers
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in SEARCH_TRIGGERS:
+        op.execute(statement)
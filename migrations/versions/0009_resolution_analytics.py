@@ -0,0 +1,54 @@
+"""resolution-time analytics tables
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('complaint_timing',
+    sa.Column('complaint_id', sa.Integer(), nullable=False),
+    sa.Column('assigned_to', sa.String(length=20), nullable=False),
+    sa.Column('department', sa.String(length=10), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('responded_at', sa.DateTime(), nullable=True),
+    sa.Column('resolved_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['complaint_id'], ['complaint.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('complaint_id')
+    )
+    op.create_table('timing_histogram',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('metric', sa.String(length=10), nullable=False),
+    sa.Column('assigned_to', sa.String(length=20), nullable=False),
+    sa.Column('department', sa.String(length=10), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('week', sa.Date(), nullable=False),
+    sa.Column('bucket', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('metric', 'assigned_to', 'department', 'category', 'week', 'bucket',
+                        name='uq_timing_histogram_key')
+    )
+    op.create_table('analytics_mark',
+    sa.Column('name', sa.String(length=30), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('analytics_mark')
+    op.drop_table('timing_histogram')
+    op.drop_table('complaint_timing')
@@ -0,0 +1,56 @@
+"""complaint SLA deadline
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+SEARCH_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS complaint_fts_ai AFTER INSERT ON complaint BEGIN
+        INSERT INTO complaint_fts(rowid, title, description, response)
+        VALUES (new.id, new.title, new.description, new.response);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS complaint_fts_ad AFTER DELETE ON complaint BEGIN
+        INSERT INTO complaint_fts(complaint_fts, rowid, title, description, response)
+        VALUES ('delete', old.id, old.title, old.description, old.response);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS complaint_fts_au
+    AFTER UPDATE OF title, description, response ON complaint BEGIN
+        INSERT INTO complaint_fts(complaint_fts, rowid, title, description, response)
+        VALUES ('delete', old.id, old.title, old.description, old.response);
+        INSERT INTO complaint_fts(rowid, title, description, response)
+        VALUES (new.id, new.title, new.description, new.response);
+    END""",
+]
+
+
+def upgrade():
+    with op.batch_alter_table('complaint', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('due_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_complaint_due_at', ['due_at'], unique=False)
+    _restore_search_triggers()
+
+
+def downgrade():
+    with op.batch_alter_table('complaint', schema=None) as batch_op:
+        batch_op.drop_index('ix_complaint_due_at')
+        batch_op.drop_column('due_at')
+    _restore_search_triggers()
+
+
+def _restore_search_triggers():
+    # SQLite batch mode rebuilds complaint, dropping the 0006 FTS triggers
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in SEARCH_TRIGGERS:
+        op.execute(statement)
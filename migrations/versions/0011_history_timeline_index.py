@@ -0,0 +1,34 @@
+"""complaint history timeline index
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('complaint_history', schema=None) as batch_op:
+        batch_op.create_index('ix_complaint_history_complaint_created', ['complaint_id', 'created_at'], unique=False)
+
+    # (complaint_id, created_at) now backs the foreign key; MySQL needs it to
+    # exist before the old single-column index can go.
+    with op.batch_alter_table('complaint_history', schema=None) as batch_op:
+        batch_op.drop_index('ix_complaint_history_complaint_id')
+
+
+def downgrade():
+    with op.batch_alter_table('complaint_history', schema=None) as batch_op:
+        batch_op.create_index('ix_complaint_history_complaint_id', ['complaint_id'], unique=False)
+
+    with op.batch_alter_table('complaint_history', schema=None) as batch_op:
+        batch_op.drop_index('ix_complaint_history_complaint_created')
@@ -0,0 +1,55 @@
+"""complaint rollup table, backfilled
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18
+
+Databases that had complaints before the rollup existed start with an empty
+complaint_rollup, and the first status change on an old complaint would
+then write a negative count. Recount every (department, category, status,
+assigned_to) from the complaint table, with the same normalisation as
+rollup._key, so the principal dashboard is right from the first request.
+
+The table is created here unless an earlier copy of 0001 already made it.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+
+BACKFILL = """
+INSERT INTO complaint_rollup (department, category, status, assigned_to, count)
+SELECT COALESCE(department, ''), category, COALESCE(status, 'Pending'),
+       COALESCE(assigned_to, ''), COUNT(*)
+FROM complaint
+GROUP BY COALESCE(department, ''), category, COALESCE(status, 'Pending'),
+         COALESCE(assigned_to, '')
+"""
+
+
+def upgrade():
+    if not sa.inspect(op.get_bind()).has_table('complaint_rollup'):
+        op.create_table('complaint_rollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('department', sa.String(length=10), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('assigned_to', sa.String(length=20), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('department', 'category', 'status', 'assigned_to', name='uq_complaint_rollup_key')
+        )
+
+    # Same as `flask rebuild-rollup`: replace whatever was counted so far
+    op.execute("DELETE FROM complaint_rollup")
+    op.execute(BACKFILL)
+
+
+def downgrade():
+    op.drop_table('complaint_rollup')
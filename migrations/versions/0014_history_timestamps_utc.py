@@ -0,0 +1,55 @@
+"""complaint history timestamps in UTC
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-18
+
+complaint_history.created_at used to come from the database clock, which is
+server-local time on MySQL, while complaint.created_at and resolved_at are
+UTC from the app. New rows are now written in UTC by the app; this moves the
+existing ones to UTC as well (MySQL: by the server's current UTC offset) and
+pads SQLite's second-precision CURRENT_TIMESTAMP values to the format the
+app writes, so they compare correctly against keyset cursors.
+
+The resolution-time analytics were computed from the mixed timestamps, so
+they are cleared here and rebuilt from the whole history by the next
+refresh (the principal's analytics page or `flask refresh-analytics`).
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0014'
+down_revision = '0013'
+branch_labels = None
+depends_on = None
+
+
+def _reset_analytics():
+    op.execute("DELETE FROM timing_histogram")
+    op.execute("DELETE FROM complaint_timing")
+    op.execute("DELETE FROM analytics_mark WHERE name = 'history'")
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'mysql':
+        op.execute(
+            "UPDATE complaint_history SET created_at = created_at"
+            " - INTERVAL TIMESTAMPDIFF(SECOND, UTC_TIMESTAMP(), NOW()) SECOND"
+        )
+    else:
+        # SQLite's CURRENT_TIMESTAMP is already UTC, only shorter
+        op.execute(
+            "UPDATE complaint_history SET created_at = created_at || '.000000'"
+            " WHERE length(created_at) = 19"
+        )
+    _reset_analytics()
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'mysql':
+        op.execute(
+            "UPDATE complaint_history SET created_at = created_at"
+            " + INTERVAL TIMESTAMPDIFF(SECOND, UTC_TIMESTAMP(), NOW()) SECOND"
+        )
+    _reset_analytics()
@@ -0,0 +1,41 @@
+"""user registration timestamps in UTC
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-18
+
+user.created_at came from the database clock (server-local on MySQL,
+second precision on SQLite) and is now set by the app in UTC. Existing rows
+are converted the same way as complaint_history in 0014, so the HOD's
+approved-students list pages by (created_at, id) without skipping or
+repeating rows.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0015'
+down_revision = '0014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'mysql':
+        op.execute(
+            "UPDATE user SET created_at = created_at"
+            " - INTERVAL TIMESTAMPDIFF(SECOND, UTC_TIMESTAMP(), NOW()) SECOND"
+        )
+    else:
+        op.execute(
+            "UPDATE user SET created_at = created_at || '.000000'"
+            " WHERE length(created_at) = 19"
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'mysql':
+        op.execute(
+            "UPDATE user SET created_at = created_at"
+            " + INTERVAL TIMESTAMPDIFF(SECOND, UTC_TIMESTAMP(), NOW()) SECOND"
+        )
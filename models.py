@@ -3,6 +3,11 @@ from flask_login import UserMixin
 from datetime import datetime
 
 class User(db.Model, UserMixin):
+    __table_args__ = (
+        # principal dashboard: newest student registrations
+        db.Index('ix_user_role_created', 'role', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
@@ -11,7 +16,9 @@ class User(db.Model, UserMixin):
     department = db.Column(db.String(10), nullable=True, index=True)
     role = db.Column(db.String(20), nullable=False, default='student', index=True)
     approved = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+    # Set by the app (UTC, full precision) so keyset cursors compare exactly
+    created_at = db.Column(db.DateTime, default=datetime.utcnow,
+                           server_default=db.func.current_timestamp())
 
     complaints = db.relationship(
         'Complaint', backref='student', lazy=True,
@@ -24,19 +31,42 @@ class User(db.Model, UserMixin):
     )
 
 
+class RosterEntry(db.Model):
+    """A PIN on a department's official enrolment list (hod.import_roster)."""
+    pin = db.Column(db.String(32), primary_key=True)
+    name = db.Column(db.String(100), nullable=True)
+    email = db.Column(db.String(120), nullable=True)
+    department = db.Column(db.String(10), nullable=False, index=True)
+    imported_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+
+
 class Complaint(db.Model):
+    # Each index matches one dashboard access path; all of them end in
+    # created_at so the keyset pages (created_at, id) come off the index
+    # without a sort.
+    __table_args__ = (
+        # HOD dashboard: assigned_to='hod' AND department=?
+        db.Index('ix_complaint_assigned_dept_created', 'assigned_to', 'department', 'created_at'),
+        # AO / warden dashboards: assigned_to=?
+        db.Index('ix_complaint_assigned_created', 'assigned_to', 'created_at'),
+        # student my_complaints
+        db.Index('ix_complaint_student_created', 'student_id', 'created_at'),
+        # principal all_complaints (no filter)
+        db.Index('ix_complaint_created_at', 'created_at'),
+        # status counters / filters
+        db.Index('ix_complaint_status', 'status'),
+        # SLA escalation: due_at <= now, oldest deadline first
+        db.Index('ix_complaint_due_at', 'due_at'),
+        # staff search on MySQL; SQLite uses the FTS5 table from search.py
+        db.Index('ix_complaint_fulltext', 'title', 'description', 'response',
+                 mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
     category = db.Column(db.String(50), nullable=False)
 
-    # Student attachments
-    attachment = db.Column(db.Text, nullable=True)
-
-    # Staff attachments (NEW!)
-    before_files = db.Column(db.Text, nullable=True)   # BEFORE work images
-    after_files = db.Column(db.Text, nullable=True)    # AFTER work images
-
     response = db.Column(db.Text, nullable=True)
     response_by = db.Column(db.String(50), nullable=True)
 
@@ -47,27 +77,95 @@ class Complaint(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, onupdate=db.func.now())
     resolved_at = db.Column(db.DateTime, nullable=True)
+    # SLA deadline while Pending (see escalation.py); NULL once answered or escalated
+    due_at = db.Column(db.DateTime, nullable=True)
 
     student_id = db.Column(
         db.Integer,
         db.ForeignKey('user.id', ondelete='CASCADE'),
-        nullable=False, index=True
+        nullable=False
+    )
+
+    # Near-duplicate of this root complaint (see duplicates.py); NULL for roots
+    cluster_id = db.Column(
+        db.Integer,
+        db.ForeignKey('complaint.id', ondelete='SET NULL'),
+        nullable=True, index=True
+    )
+
+    attachments = db.relationship(
+        'Attachment', backref='complaint', lazy=True,
+        order_by='Attachment.id',
+        cascade='all, delete-orphan', passive_deletes=True
+    )
+
+    def files(self, kind):
+        """Stored filenames of one kind: 'student', 'before' or 'after'."""
+        return [a.stored_name for a in self.attachments if a.kind == kind]
+
+
+class Attachment(db.Model):
+    __table_args__ = (
+        db.Index('ix_attachment_complaint_kind', 'complaint_id', 'kind'),
+        # view_file authorization: which complaints reference this file
+        db.Index('ix_attachment_stored_name', 'stored_name'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    complaint_id = db.Column(
+        db.Integer,
+        db.ForeignKey('complaint.id', ondelete='CASCADE'),
+        nullable=False
+    )
+
+    kind = db.Column(db.String(10), nullable=False)    # student / before / after
+    stored_name = db.Column(db.String(255), nullable=False)
+    size = db.Column(db.Integer, nullable=True)
+    mime_type = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ComplaintSignature(db.Model):
+    """MinHash signature of an open complaint in a shared category."""
+    complaint_id = db.Column(
+        db.Integer,
+        db.ForeignKey('complaint.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    minhash = db.Column(db.LargeBinary, nullable=False)
+
+
+class SignatureBucket(db.Model):
+    """LSH band hash → complaint; complaints sharing a bucket are candidates."""
+    bucket = db.Column(db.BigInteger, primary_key=True, autoincrement=False)
+    complaint_id = db.Column(
+        db.Integer,
+        db.ForeignKey('complaint.id', ondelete='CASCADE'),
+        primary_key=True, index=True
     )
 
 
 class ComplaintHistory(db.Model):
+    __table_args__ = (
+        # Timeline pages, newest first: complaint_id=? ORDER BY created_at, id
+        db.Index('ix_complaint_history_complaint_created', 'complaint_id', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
 
     complaint_id = db.Column(
         db.Integer, 
         db.ForeignKey('complaint.id', ondelete='CASCADE'),
-        nullable=False, index=True
+        nullable=False
     )
 
     action = db.Column(db.String(100), nullable=False)
     message = db.Column(db.Text, nullable=True)
     performed_by = db.Column(db.String(50), nullable=False)
-    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    # UTC like complaint.created_at / resolved_at, which analytics.py
+    # subtracts it from; the database clock is server-local on MySQL
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.now())
 
     complaint = db.relationship(
         'Complaint',
@@ -87,3 +185,90 @@ class Notification(db.Model):
     message = db.Column(db.String(255), nullable=False)
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+
+
+class ComplaintRollup(db.Model):
+    """Complaint counts per (department, category, status, assigned_to).
+
+    Kept in step with the complaint table by rollup.py in the same
+    transaction as every insert / status change.
+    """
+    __table_args__ = (
+        db.UniqueConstraint('department', 'category', 'status', 'assigned_to',
+                            name='uq_complaint_rollup_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    department = db.Column(db.String(10), nullable=False, default='')
+    category = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(50), nullable=False)
+    assigned_to = db.Column(db.String(20), nullable=False, default='')
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ComplaintTiming(db.Model):
+    """When a complaint was first answered and resolved (analytics.py facts)."""
+    complaint_id = db.Column(
+        db.Integer,
+        db.ForeignKey('complaint.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    assigned_to = db.Column(db.String(20), nullable=False, default='')
+    department = db.Column(db.String(10), nullable=False, default='')
+    category = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+    responded_at = db.Column(db.DateTime, nullable=True)
+    resolved_at = db.Column(db.DateTime, nullable=True)
+
+
+class TimingHistogram(db.Model):
+    """Log-bucketed counts of response / resolution times.
+
+    One row per (metric, assigned_to, department, category, week, bucket);
+    analytics.py adds to it and reads percentiles from summed buckets.
+    """
+    __table_args__ = (
+        db.UniqueConstraint('metric', 'assigned_to', 'department', 'category', 'week', 'bucket',
+                            name='uq_timing_histogram_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    metric = db.Column(db.String(10), nullable=False)      # response / resolution
+    assigned_to = db.Column(db.String(20), nullable=False, default='')
+    department = db.Column(db.String(10), nullable=False, default='')
+    category = db.Column(db.String(50), nullable=False)
+    week = db.Column(db.Date, nullable=False)               # Monday of created_at
+    bucket = db.Column(db.Integer, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class AnalyticsMark(db.Model):
+    """High-water marks of incremental jobs (last processed id)."""
+    name = db.Column(db.String(30), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+
+class FragmentVersion(db.Model):
+    """Version of one dashboard scope's cached fragments (see fragments.py)."""
+    scope = db.Column(db.String(40), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class OutboxEvent(db.Model):
+    """Side effect recorded in the same commit as the change that causes it.
+
+    outbox.py delivers pending events (dispatched_at IS NULL) in batches and
+    reschedules failed ones with backoff.
+    """
+    __table_args__ = (
+        db.Index('ix_outbox_pending', 'dispatched_at', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)        # JSON
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    dispatched_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,202 @@
+# notifications.py
+# Notification list, read receipts and a Server-Sent Events stream.
+#
+# Unread counts live in the cache and are adjusted whenever notifications are
+# written (outbox dispatcher) or read, so rendering a badge does not touch the
+# database. Pages poll /unread for the badge by default. The stream is only
+# served with NOTIFY_TRANSPORT=sse, since each open stream occupies a worker
+# for its whole lifetime; it belongs on async workers (see gunicorn.conf.py).
+# Idle streams only poll a per-user change token in the cache.
+import json
+import time
+
+from flask import (Blueprint, Response, abort, current_app, jsonify, redirect,
+                   render_template, request, stream_with_context, url_for)
+from flask_login import current_user, login_required
+from sqlalchemy import func, update
+
+import cache
+from extensions import db
+from models import Notification
+
+notifications = Blueprint('notifications', __name__)
+
+UNREAD_KEY = "notifications:unread:{}"
+CHANGED_KEY = "notifications:changed:{}"
+
+
+# ===================================================================
+# CACHED COUNTERS
+# ===================================================================
+def unread_count(user_id):
+    key = UNREAD_KEY.format(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = db.session.query(func.count(Notification.id)).filter(
+            Notification.user_id == user_id,
+            Notification.is_read.is_(False),
+        ).scalar()
+        cache.set(key, count)
+    return count
+
+
+def _touch(user_id):
+    # Open streams compare this token to decide whether to query
+    cache.set(CHANGED_KEY.format(user_id), time.time_ns())
+
+
+def _adjust(user_id, delta):
+    key = UNREAD_KEY.format(user_id)
+    if cache.shared():
+        cache.incr(key, delta)
+    else:
+        # A per-process count can't be kept right in place; drop it so the
+        # next poll recounts. Other workers' copies expire after
+        # CACHE_DEFAULT_TTL, so run several workers with CACHE_URL set.
+        cache.delete(key)
+
+
+def notified(counts):
+    """Called after new notifications are committed: {user_id: how many}."""
+    for user_id, n in counts.items():
+        _adjust(user_id, n)
+        _touch(user_id)
+
+
+def _marked_read(user_id, n=None):
+    if n is None:
+        cache.set(UNREAD_KEY.format(user_id), 0)
+    elif n:
+        _adjust(user_id, -n)
+    _touch(user_id)
+
+
+# ===================================================================
+# LIST / MARK READ
+# ===================================================================
+@notifications.route('/')
+@login_required
+def notification_list():
+    notes = (
+        Notification.query
+        .filter_by(user_id=current_user.id)
+        .order_by(Notification.id.desc())
+        .limit(100)
+        .all()
+    )
+    return render_template("notifications.html", notes=notes)
+
+
+@notifications.route('/<int:nid>/read', methods=['POST'])
+@login_required
+def mark_read(nid):
+    user_id = current_user.id
+    changed = db.session.execute(
+        update(Notification)
+        .where(Notification.id == nid,
+               Notification.user_id == user_id,
+               Notification.is_read.is_(False))
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    _marked_read(user_id, changed)
+    return redirect(url_for('notifications.notification_list'))
+
+
+@notifications.route('/read-all', methods=['POST'])
+@login_required
+def mark_all_read():
+    user_id = current_user.id
+    db.session.execute(
+        update(Notification)
+        .where(Notification.user_id == user_id,
+               Notification.is_read.is_(False))
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    _marked_read(user_id)
+    return redirect(url_for('notifications.notification_list'))
+
+
+@notifications.route('/unread')
+@login_required
+def unread():
+    return jsonify(unread=unread_count(current_user.id))
+
+
+# ===================================================================
+# SERVER-SENT EVENTS
+# ===================================================================
+def _event(name, data, event_id=None):
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+def _newer(user_id, last_id):
+    rows = (
+        Notification.query
+        .filter(Notification.user_id == user_id, Notification.id > last_id)
+        .order_by(Notification.id)
+        .limit(50)
+        .all()
+    )
+    # Don't hold a pooled connection while the stream sleeps
+    db.session.close()
+    return rows
+
+
+@notifications.route('/stream')
+@login_required
+def stream():
+    config = current_app.config
+    if config.get("NOTIFY_TRANSPORT", "poll") != "sse":
+        abort(404)
+
+    poll = config.get("NOTIFY_STREAM_POLL_SECONDS", 2)
+    resync = config.get("NOTIFY_RESYNC_SECONDS", 60)
+    lifetime = config.get("NOTIFY_STREAM_SECONDS", 300)
+
+    user_id = current_user.id
+    last_id = request.headers.get("Last-Event-ID", type=int)
+    if last_id is None:
+        last_id = db.session.query(func.max(Notification.id)).filter(
+            Notification.user_id == user_id).scalar() or 0
+
+    def events():
+        # Clients reconnect (sending Last-Event-ID) when the stream ends
+        yield f"retry: {int(poll * 1000)}\n\n"
+        yield _event("unread", {"unread": unread_count(user_id)})
+        db.session.close()
+
+        nonlocal last_id
+        token = cache.get(CHANGED_KEY.format(user_id))
+        now = time.monotonic()
+        deadline, next_resync = now + lifetime, now + resync
+
+        while time.monotonic() < deadline:
+            time.sleep(poll)
+            current = cache.get(CHANGED_KEY.format(user_id))
+
+            if current == token and time.monotonic() < next_resync:
+                yield ": idle\n\n"
+                continue
+
+            # Changed (or periodic check, for per-worker caches)
+            token, next_resync = current, time.monotonic() + resync
+            for n in _newer(user_id, last_id):
+                last_id = n.id
+                yield _event("notification", {
+                    "id": n.id,
+                    "message": n.message,
+                    "created_at": n.created_at.isoformat() if n.created_at else None,
+                }, event_id=n.id)
+            yield _event("unread", {"unread": unread_count(user_id)})
+            db.session.close()
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,274 @@
+# outbox.py
+# Transactional outbox for notifications.
+#
+# Handlers call enqueue() before committing, so the event row lands in the
+# same transaction as the complaint it describes. A dispatcher (a thread in
+# each worker, or `flask dispatch-outbox`) later turns pending events into
+# Notification rows in batches. Failed events are retried with exponential
+# backoff until they are delivered.
+import json
+import logging
+import os
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session
+
+import metrics
+import notifications
+from extensions import db
+from models import Notification, OutboxEvent, User
+
+log = logging.getLogger(__name__)
+
+# kind → handler(payload, staff) returning Notification row dicts
+HANDLERS = {}
+
+_wakeup = threading.Event()
+_dispatcher_pid = None
+_dispatcher_lock = threading.Lock()
+
+
+def handler(kind):
+    def decorator(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+def enqueue(kind, **payload):
+    """Add an event to the current session; it is committed with the caller's changes."""
+    db.session.add(OutboxEvent(kind=kind, payload=json.dumps(payload)))
+    db.session.info["outbox_pending"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_after_commit(session):
+    # New events are picked up right away instead of at the next poll
+    if session.info.pop("outbox_pending", False):
+        _wakeup.set()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop("outbox_pending", None)
+
+
+# ============================================================
+# HANDLERS
+# ============================================================
+class StaffLookup:
+    """Staff ids per (role, department), looked up once per batch."""
+
+    def __init__(self):
+        self._ids = {}
+
+    def __call__(self, role, department=None):
+        key = (role, department if role == "hod" else None)
+        if key not in self._ids:
+            query = db.session.query(User.id).filter(User.role == role)
+            if role == "hod":
+                query = query.filter(User.department == department)
+            self._ids[key] = [uid for (uid,) in query]
+        return self._ids[key]
+
+
+@handler("complaint_created")
+def _complaint_created(payload, staff):
+    message = f"New complaint submitted: {payload['title']}"[:255]
+    return [
+        {"user_id": uid, "message": message}
+        for uid in staff(payload["assigned_to"], payload.get("department"))
+    ]
+
+
+@handler("complaint_escalated")
+def _complaint_escalated(payload, staff):
+    title = payload["title"]
+    to_principal = f"Escalated to you (no response in time): {title}"[:255]
+    to_staff = f"Escalated to the principal (no response in time): {title}"[:255]
+    return (
+        [{"user_id": uid, "message": to_principal} for uid in staff("principal")]
+        + [{"user_id": uid, "message": to_staff}
+           for uid in staff(payload["escalated_from"], payload.get("department"))]
+    )
+
+
+@handler("complaint_status")
+def _complaint_status(payload, staff):
+    message = f"Your complaint \"{payload['title']}\" is now {payload['status']}"[:255]
+    return [{"user_id": payload["student_id"], "message": message}]
+
+
+# ============================================================
+# DISPATCH
+# ============================================================
+def _backoff(attempts):
+    cap = current_app.config.get("OUTBOX_MAX_BACKOFF_SECONDS", 600)
+    return timedelta(seconds=min(cap, 5 * 2 ** (attempts - 1)))
+
+
+def _retry_later(event, now, error):
+    event.attempts += 1
+    event.last_error = repr(error)[:1000]
+    event.next_attempt_at = now + _backoff(event.attempts)
+    metrics.OUTBOX_EVENTS.labels(kind=event.kind, outcome="retry").inc()
+    log.warning("Outbox event %s (%s) failed, attempt %s: %r",
+                event.id, event.kind, event.attempts, error)
+
+
+def _build(event, staff):
+    fn = HANDLERS.get(event.kind)
+    if fn is None:
+        raise LookupError(f"no outbox handler for {event.kind!r}")
+    return fn(json.loads(event.payload), staff)
+
+
+def _claim(ids, now):
+    """Mark events delivered unless another dispatcher got there first."""
+    claimed = db.session.execute(
+        update(OutboxEvent)
+        .where(OutboxEvent.id.in_(ids), OutboxEvent.dispatched_at.is_(None))
+        .values(dispatched_at=now, attempts=OutboxEvent.attempts + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    return claimed == len(ids)
+
+
+def dispatch_pending(limit=None):
+    """Deliver one batch of due events. Returns how many events were handled."""
+    limit = limit or current_app.config.get("OUTBOX_BATCH_SIZE", 100)
+    now = datetime.utcnow()
+
+    events = (
+        OutboxEvent.query
+        .filter(OutboxEvent.dispatched_at.is_(None), OutboxEvent.next_attempt_at <= now)
+        .order_by(OutboxEvent.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not events:
+        db.session.rollback()
+        return 0
+
+    staff = StaffLookup()
+    delivered, rows = [], []
+    for ev in events:
+        try:
+            rows.extend(_build(ev, staff))
+            delivered.append(ev)
+        except Exception as e:
+            _retry_later(ev, now, e)
+
+    kinds = [ev.kind for ev in delivered]
+    try:
+        if delivered and not _claim([ev.id for ev in delivered], now):
+            db.session.rollback()
+            return 0
+        if rows:
+            db.session.execute(insert(Notification), rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        log.exception("Outbox batch failed, delivering events one by one")
+        return _dispatch_one_by_one([ev.id for ev in events], now)
+
+    notifications.notified(Counter(row["user_id"] for row in rows))
+    for kind in kinds:
+        metrics.OUTBOX_EVENTS.labels(kind=kind, outcome="delivered").inc()
+    return len(events)
+
+
+def _dispatch_one_by_one(ids, now):
+    """Fallback after a failed batch: isolate the events that cannot be delivered."""
+    staff = StaffLookup()
+    written = Counter()
+
+    for ev in OutboxEvent.query.filter(OutboxEvent.id.in_(ids),
+                                       OutboxEvent.dispatched_at.is_(None)):
+        try:
+            with db.session.begin_nested():
+                rows = _build(ev, staff)
+                if rows:
+                    db.session.execute(insert(Notification), rows)
+                ev.attempts += 1
+                ev.dispatched_at = now
+            written.update(row["user_id"] for row in rows)
+            metrics.OUTBOX_EVENTS.labels(kind=ev.kind, outcome="delivered").inc()
+        except Exception as e:
+            _retry_later(ev, now, e)
+
+    db.session.commit()
+    notifications.notified(written)
+    return len(ids)
+
+
+def drain(app):
+    """Dispatch batches until nothing is due."""
+    with app.app_context():
+        while dispatch_pending():
+            pass
+
+
+# ============================================================
+# BACKGROUND DISPATCHER
+# ============================================================
+def _run(app, interval):
+    while True:
+        try:
+            drain(app)
+        except Exception:
+            log.exception("Outbox dispatcher error")
+        _wakeup.wait(interval)
+        _wakeup.clear()
+
+
+def start_dispatcher(app):
+    """Start this process's dispatcher thread (once per pid, so forks get their own)."""
+    global _dispatcher_pid
+    if _dispatcher_pid == os.getpid():
+        return
+
+    with _dispatcher_lock:
+        if _dispatcher_pid == os.getpid():
+            return
+        _dispatcher_pid = os.getpid()
+
+    threading.Thread(
+        target=_run,
+        args=(app, app.config.get("OUTBOX_POLL_SECONDS", 5)),
+        name="outbox-dispatcher",
+        daemon=True,
+    ).start()
+
+
+@click.command("dispatch-outbox")
+@click.option("--once", is_flag=True, help="Deliver what is due and exit.")
+@with_appcontext
+def dispatch_outbox_command(once):
+    """Deliver pending outbox events (for OUTBOX_DISPATCHER=off deployments)."""
+    app = current_app._get_current_object()
+
+    if once:
+        drain(app)
+        pending = OutboxEvent.query.filter(OutboxEvent.dispatched_at.is_(None)).count()
+        click.echo(f"Outbox drained, {pending} event(s) waiting for retry.")
+        return
+
+    click.echo("Dispatching outbox events, Ctrl+C to stop.")
+    _run(app, app.config.get("OUTBOX_POLL_SECONDS", 5))
+
+
+def init_app(app):
+    if app.config.get("OUTBOX_DISPATCHER", "thread") != "thread":
+        return
+
+    @app.before_request
+    def _ensure_dispatcher():
+        start_dispatcher(app)
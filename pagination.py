@@ -0,0 +1,89 @@
+# pagination.py
+# Keyset (cursor) pagination ordered newest first: complaints, or any other
+# model with created_at and id (complaint history timelines).
+#
+# Pages are addressed by the (created_at, id) of the row at their edge, so
+# fetching page 500 costs the same index range scan as fetching page 1.
+import base64
+from datetime import datetime
+
+from flask import current_app, request
+from sqlalchemy import and_, or_
+
+from models import Complaint
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(complaint):
+    raw = f"{complaint.created_at.isoformat()}|{complaint.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Return (created_at, id) or None for a missing/garbled cursor."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        stamp, cid = raw.rsplit("|", 1)
+        return datetime.fromisoformat(stamp), int(cid)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_paginate(query, after=None, before=None, per_page=None, model=Complaint):
+    """Page an (unordered) query of ``model`` newest first.
+
+    ``after`` continues towards older rows, ``before`` goes back towards
+    newer ones. Both default to the ``after`` / ``before`` request args.
+    """
+    if after is None and before is None:
+        after = request.args.get("after")
+        before = request.args.get("before")
+
+    per_page = per_page or current_app.config.get("COMPLAINTS_PER_PAGE", 25)
+    created, cid = model.created_at, model.id
+
+    back = decode_cursor(before)
+    if back is not None:
+        at, pk = back
+        rows = query.filter(
+            or_(created > at, and_(created == at, cid > pk))
+        ).order_by(created.asc(), cid.asc()).limit(per_page + 1).all()
+
+        more_newer = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+
+        return KeysetPage(
+            rows,
+            next_cursor=encode_cursor(rows[-1]) if rows else None,
+            prev_cursor=encode_cursor(rows[0]) if rows and more_newer else None,
+        )
+
+    forward = decode_cursor(after)
+    if forward is not None:
+        at, pk = forward
+        query = query.filter(or_(created < at, and_(created == at, cid < pk)))
+
+    rows = query.order_by(created.desc(), cid.desc()).limit(per_page + 1).all()
+
+    more_older = len(rows) > per_page
+    rows = rows[:per_page]
+
+    return KeysetPage(
+        rows,
+        next_cursor=encode_cursor(rows[-1]) if more_older else None,
+        prev_cursor=encode_cursor(rows[0]) if rows and forward is not None else None,
+    )
@@ -1,8 +1,19 @@
 # principal.py
-from flask import Blueprint, render_template, redirect, url_for, flash
+from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from models import Complaint, User
 from extensions import db
+from query_counter import query_budget
+from db_routing import read_replica
+from sqlite_profile import writes
+from pagination import keyset_paginate
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+import rollup
+import analytics
+import duplicates
+import fragments
+import workflow
 
 principal = Blueprint('principal', __name__, template_folder='templates/principal')
 
@@ -11,71 +22,184 @@ principal = Blueprint('principal', __name__, template_folder='templates/principa
 
 @principal.route('/dashboard')
 @login_required
+@query_budget(6)
+@read_replica
 def principal_dashboard():
     if current_user.role != 'principal':
         flash('Access denied', 'danger')
         return redirect('/')
 
-    # All complaints (for table)
-    complaints = Complaint.query.order_by(Complaint.created_at.desc()).all()
+    def page():
+        # All complaints (for table, one page at a time)
+        complaints = keyset_paginate(
+            Complaint.query.options(joinedload(Complaint.student))
+        )
+
+        # Counter widgets, all read from the rollup table in one query
+        counts = rollup.summary()
+        by_status = counts['by_status']
+
+        dept_counts = {'CSE': 0, 'ECE': 0}
+        dept_counts.update(counts['by_department'])
+        dept_counts.pop('', None)
+
+        # Student counts per department (one GROUP BY)
+        students = dict(
+            db.session.query(User.department, func.count(User.id))
+            .filter(User.role == 'student')
+            .group_by(User.department).all()
+        )
+
+        # Recent student registrations (last 5)
+        recent_students = User.query.filter_by(role='student').order_by(User.created_at.desc()).limit(5).all()
+
+        return dict(
+            complaints=complaints,
+            total=counts['total'],
+            pending=by_status.get('Pending', 0),
+            in_progress=by_status.get('In Progress', 0),
+            resolved=by_status.get('Resolved', 0),
+            cse_students=students.get('CSE', 0),
+            ece_students=students.get('ECE', 0),
+            dept_counts=dept_counts,
+            category_counts=counts['by_category'],
+            recent_students=recent_students,
+            profile=current_user
+        )
+
+    # Every complaint or student write moves the principal's version
+    return fragments.render('principal/dashboard.html', 'principal', page,
+                            vary=current_user.id)
 
-    # Recent 5 complaints
-    recent_complaints = Complaint.query.order_by(Complaint.created_at.desc()).limit(5).all()
 
-    # Counter widgets
-    total = Complaint.query.count()
-    pending = Complaint.query.filter_by(status='Pending').count()
-    in_progress = Complaint.query.filter_by(status='In Progress').count()
-    resolved = Complaint.query.filter_by(status='Resolved').count()
 
-    # Department counts
-    cse_students = User.query.filter_by(department='CSE', role='student').count()
-    ece_students = User.query.filter_by(department='ECE', role='student').count()
+@principal.route('/all_complaints')
+@login_required
+@query_budget(2)
+@read_replica
+def all_complaints():
 
-    # Complaints by department
-    dept_counts = {
-        'CSE': Complaint.query.filter_by(department='CSE').count(),
-        'ECE': Complaint.query.filter_by(department='ECE').count(),
-    }
+    if current_user.role != 'principal':
+        flash('Access denied', 'danger')
+        return redirect('/')
 
-    # Complaints by category
-    from sqlalchemy import func
-    category_counts = dict(
-        Complaint.query.with_entities(Complaint.category, func.count(Complaint.id)).group_by(Complaint.category).all()
+    complaints = keyset_paginate(
+        Complaint.query.options(joinedload(Complaint.student))
     )
 
-    # Recent student registrations (last 5)
-    recent_students = User.query.filter_by(role='student').order_by(User.created_at.desc()).limit(5).all()
-
     return render_template(
-        'principal/dashboard.html',
-        complaints=complaints,
-        recent_complaints=recent_complaints,
-        total=total,
-        pending=pending,
-        in_progress=in_progress,
-        resolved=resolved,
-        cse_students=cse_students,
-        ece_students=ece_students,
-        dept_counts=dept_counts,
-        category_counts=category_counts,
-        recent_students=recent_students,
-        profile=current_user
+        'principal/all_complaints.html',
+        complaints=complaints
     )
 
 
+@principal.route('/analytics')
+@writes
+@login_required
+def analytics_view():
 
-@principal.route('/all_complaints')
+    if current_user.role != 'principal':
+        flash('Access denied', 'danger')
+        return redirect('/')
+
+    # Folds in history since the last view (at most once a minute)
+    analytics.refresh_if_stale()
+
+    counts = rollup.summary()
+    data = {
+        'total': counts['total'],
+        'pending': counts['by_status'].get('Pending', 0),
+        'resolved': counts['by_status'].get('Resolved', 0),
+        'by_category': counts['by_category'],
+        'timing': analytics.report(),
+    }
+    return render_template('analytics.html', data=data)
+
+
+# ========================================================
+# ESCALATED COMPLAINTS (SLA missed, see escalation.py)
+# ========================================================
+@principal.route('/escalated')
 @login_required
-def all_complaints():
+@query_budget(3)
+def escalated():
 
     if current_user.role != 'principal':
         flash('Access denied', 'danger')
         return redirect('/')
 
-    complaints = Complaint.query.order_by(Complaint.created_at.desc()).all()
+    complaints = keyset_paginate(
+        Complaint.query.options(joinedload(Complaint.student)).filter_by(
+            assigned_to='principal',
+            cluster_id=None
+        )
+    )
 
     return render_template(
-        'principal/all_complaints.html',
-        complaints=complaints
+        'principal/escalated.html',
+        complaints=complaints,
+        cluster_sizes=duplicates.cluster_sizes([c.id for c in complaints])
     )
+
+
+@principal.route('/respond/<int:complaint_id>', methods=['POST'])
+@login_required
+def respond(complaint_id):
+
+    if current_user.role != 'principal':
+        flash('Access denied', 'danger')
+        return redirect('/')
+
+    c = Complaint.query.get_or_404(complaint_id)
+
+    if not workflow.handles(current_user, c):
+        flash("This complaint is not assigned to you.", "warning")
+        return redirect(url_for('principal.escalated'))
+    response_text = request.form.get("response")
+
+    if c.status != "Pending":
+        flash("This complaint has already been answered.", "info")
+        return redirect(url_for('principal.escalated'))
+
+    if not response_text:
+        flash("Response cannot be empty.", "danger")
+        return redirect(url_for('principal.escalated'))
+
+    try:
+        workflow.transition(c, "respond", current_user.name, "Responded by Principal",
+                            response=response_text)
+    except workflow.TransitionError as e:
+        flash(str(e), "warning")
+        return redirect(url_for('principal.escalated'))
+
+    flash("Response submitted! Work now In Progress.", "success")
+    return redirect(url_for('principal.escalated'))
+
+
+@principal.route('/resolve/<int:complaint_id>', methods=['POST'])
+@login_required
+def resolve(complaint_id):
+
+    if current_user.role != 'principal':
+        flash('Access denied', 'danger')
+        return redirect('/')
+
+    c = Complaint.query.get_or_404(complaint_id)
+
+    if not workflow.handles(current_user, c):
+        flash("This complaint is not assigned to you.", "warning")
+        return redirect(url_for('principal.escalated'))
+
+    if c.status == "Resolved":
+        flash("Already resolved!", "info")
+        return redirect(url_for('principal.escalated'))
+
+    try:
+        workflow.transition(c, "resolve", current_user.name, "Resolved by Principal",
+                            message=request.form.get("message") or None)
+    except workflow.TransitionError as e:
+        flash(str(e), "warning")
+        return redirect(url_for('principal.escalated'))
+
+    flash("Complaint marked as RESOLVED!", "success")
+    return redirect(url_for('principal.escalated'))
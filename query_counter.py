@@ -0,0 +1,139 @@
+# query_counter.py
+# Counts SQL statements per request and enforces per-route query budgets.
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_app_context, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = []
+        self.parameters = []
+
+    def record(self, statement, parameters, elapsed):
+        self.count += 1
+        self.seconds += elapsed
+        self.statements.append(statement)
+        self.parameters.append(parameters)
+
+
+# ============================================================
+# ENGINE EVENTS (every engine, including extra binds)
+# ============================================================
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+
+    for counter in getattr(_local, "counters", ()):
+        counter.record(statement, parameters, elapsed)
+
+    if has_request_context() and "query_counter" in g:
+        g.query_counter.record(statement, parameters, elapsed)
+
+
+def current_counter():
+    if has_request_context():
+        return g.get("query_counter")
+    return None
+
+
+@contextmanager
+def count_queries():
+    """Count every statement run by this thread inside the block."""
+    counter = QueryCounter()
+    stack = _local.__dict__.setdefault("counters", [])
+    stack.append(counter)
+    try:
+        yield counter
+    finally:
+        stack.remove(counter)
+
+
+# ============================================================
+# BUDGETS
+# ============================================================
+def _over_budget(endpoint, budget, counter):
+    msg = f"{endpoint} ran {counter.count} queries (budget {budget})"
+    if has_app_context() and current_app.config.get("QUERY_BUDGET_STRICT", current_app.testing):
+        raise QueryBudgetExceeded(msg + ":\n" + "\n".join(counter.statements))
+    log.warning(msg)
+
+
+def query_budget(budget):
+    """Declare the maximum number of SQL statements a request to this
+    view may run, including the Flask-Login user lookup."""
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            rv = view(*args, **kwargs)
+            counter = current_counter()
+            if counter is not None and counter.count > budget:
+                _over_budget(view.__name__, budget, counter)
+            return rv
+
+        wrapped.query_budget = budget
+        return wrapped
+    return decorator
+
+
+def assert_query_budget(client, path, budget=None, **kwargs):
+    """Test helper: GET ``path`` and fail if it exceeds its budget.
+
+    Without an explicit ``budget`` the one declared on the view with
+    ``@query_budget`` is used.
+    """
+    app = client.application
+
+    if budget is None:
+        endpoint, _ = app.url_map.bind("localhost").match(path.split("?")[0])
+        budget = getattr(app.view_functions[endpoint], "query_budget", None)
+        if budget is None:
+            raise QueryBudgetExceeded(f"{endpoint} has no declared query budget")
+
+    with count_queries() as counter:
+        response = client.get(path, **kwargs)
+
+    if counter.count > budget:
+        raise QueryBudgetExceeded(
+            f"GET {path} ran {counter.count} queries (budget {budget}):\n"
+            + "\n".join(counter.statements)
+        )
+    return response
+
+
+# ============================================================
+# FLASK HOOKS
+# ============================================================
+def init_app(app):
+
+    @app.before_request
+    def _start_query_counter():
+        g.query_counter = QueryCounter()
+
+    @app.after_request
+    def _query_count_header(response):
+        counter = current_counter()
+        if counter is not None and (app.debug or app.testing):
+            response.headers["X-Query-Count"] = str(counter.count)
+        return response
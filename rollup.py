@@ -0,0 +1,166 @@
+# rollup.py
+# Incrementally maintained complaint counts for the principal dashboard.
+#
+# Every handler that inserts a complaint or changes its status calls one of
+# the record_* helpers before committing, so the rollup row moves in the same
+# transaction as the complaint itself.
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import Complaint, ComplaintRollup
+
+
+def _key(department, category, status, assigned_to):
+    return (department or '', category, status or 'Pending', assigned_to or '')
+
+
+def _match(key):
+    department, category, status, assigned_to = key
+    return (
+        ComplaintRollup.department == department,
+        ComplaintRollup.category == category,
+        ComplaintRollup.status == status,
+        ComplaintRollup.assigned_to == assigned_to,
+    )
+
+
+def _increment(key, delta):
+    return db.session.execute(
+        update(ComplaintRollup)
+        .where(*_match(key))
+        .values(count=ComplaintRollup.count + delta)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def bump(department, category, status, assigned_to, delta=1):
+    key = _key(department, category, status, assigned_to)
+
+    if _increment(key, delta):
+        return
+
+    department, category, status, assigned_to = key
+    try:
+        with db.session.begin_nested():
+            db.session.add(ComplaintRollup(
+                department=department, category=category, status=status,
+                assigned_to=assigned_to, count=delta
+            ))
+    except IntegrityError:
+        # Another transaction created the row first
+        _increment(key, delta)
+
+
+def record_created(complaint):
+    bump(complaint.department, complaint.category, complaint.status,
+         complaint.assigned_to, +1)
+
+
+def record_deleted(complaint):
+    bump(complaint.department, complaint.category, complaint.status,
+         complaint.assigned_to, -1)
+
+
+def record_status_change(complaint, old_status):
+    if (old_status or 'Pending') == (complaint.status or 'Pending'):
+        return
+    bump(complaint.department, complaint.category, old_status,
+         complaint.assigned_to, -1)
+    bump(complaint.department, complaint.category, complaint.status,
+         complaint.assigned_to, +1)
+
+
+# ============================================================
+# READ SIDE
+# ============================================================
+def summary():
+    """All dashboard counters from a single SELECT on the rollup table."""
+    out = {
+        'total': 0,
+        'by_status': {},
+        'by_department': {},
+        'by_category': {},
+    }
+
+    rows = db.session.query(
+        ComplaintRollup.department, ComplaintRollup.category,
+        ComplaintRollup.status, ComplaintRollup.count
+    ).filter(ComplaintRollup.count != 0).all()
+
+    for department, category, status, count in rows:
+        out['total'] += count
+        out['by_status'][status] = out['by_status'].get(status, 0) + count
+        out['by_department'][department] = out['by_department'].get(department, 0) + count
+        out['by_category'][category] = out['by_category'].get(category, 0) + count
+
+    return out
+
+
+# ============================================================
+# REBUILD / DRIFT CHECK
+# ============================================================
+def actual_counts():
+    rows = db.session.query(
+        Complaint.department, Complaint.category, Complaint.status,
+        Complaint.assigned_to, func.count(Complaint.id)
+    ).group_by(
+        Complaint.department, Complaint.category,
+        Complaint.status, Complaint.assigned_to
+    ).all()
+
+    counts = {}
+    for department, category, status, assigned_to, n in rows:
+        key = _key(department, category, status, assigned_to)
+        counts[key] = counts.get(key, 0) + n
+    return counts
+
+
+def stored_counts():
+    return {
+        (r.department, r.category, r.status, r.assigned_to): r.count
+        for r in ComplaintRollup.query.all()
+        if r.count
+    }
+
+
+def drift():
+    actual, stored = actual_counts(), stored_counts()
+    return sorted(
+        (key, stored.get(key, 0), actual.get(key, 0))
+        for key in set(actual) | set(stored)
+        if stored.get(key, 0) != actual.get(key, 0)
+    )
+
+
+def rebuild():
+    ComplaintRollup.query.delete()
+    for (department, category, status, assigned_to), n in actual_counts().items():
+        db.session.add(ComplaintRollup(
+            department=department, category=category, status=status,
+            assigned_to=assigned_to, count=n
+        ))
+    db.session.commit()
+
+
+@click.command('rebuild-rollup')
+@click.option('--check', is_flag=True, help='Only report drift, do not rewrite.')
+@with_appcontext
+def rebuild_rollup_command(check):
+    """Recount complaint_rollup from the complaint table."""
+    rows = drift()
+
+    for (department, category, status, assigned_to), stored, actual in rows:
+        click.echo(f"{department or '-'}/{category}/{status}/{assigned_to or '-'}: "
+                   f"rollup={stored} actual={actual}")
+
+    if not rows:
+        click.echo("Rollup is in sync.")
+    elif check:
+        raise SystemExit(1)
+
+    if not check:
+        rebuild()
+        click.echo("Rollup rebuilt.")
@@ -0,0 +1,104 @@
+# roster.py
+# HOD roster import: a department's official enrolment list, read from a CSV
+# upload one row at a time and inserted in batches, so a roster of any size
+# never sits in memory. PINs follow the same rules as auth.register.
+#
+# The roster itself grants nothing; it lets an HOD approve every pending
+# registration whose PIN is on it with one UPDATE (hod.bulk_students).
+import csv
+import io
+
+from flask import current_app
+from sqlalchemy import insert, select
+
+from auth import validate_pin
+from extensions import db
+from models import RosterEntry
+
+MAX_NAME = 100
+MAX_EMAIL = 120
+
+
+class ImportResult:
+    def __init__(self, max_errors):
+        self.inserted = 0
+        self.skipped = 0            # already on the roster
+        self.errors = []            # [(line, pin, message)], first max_errors
+        self.more_errors = 0
+        self._max_errors = max_errors
+
+    def error(self, line, pin, message):
+        if len(self.errors) < self._max_errors:
+            self.errors.append((line, pin, message))
+        else:
+            self.more_errors += 1
+
+
+def import_csv(stream, department):
+    """Import a binary CSV stream with a header row: pin[, name, email]."""
+    config = current_app.config
+    batch_size = config.get("ROSTER_BATCH_SIZE", 500)
+    result = ImportResult(config.get("ROSTER_MAX_ERRORS", 200))
+
+    reader = csv.reader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    try:
+        header = [h.strip().lower() for h in next(reader, [])]
+        if "pin" not in header:
+            result.error(1, "", "Header row must have a 'pin' column")
+            return result
+
+        batch, seen = [], set()
+        for fields in reader:
+            if not any(f.strip() for f in fields):
+                continue
+            line = reader.line_num
+            row = dict(zip(header, (f.strip() for f in fields)))
+            pin = row.get("pin", "").upper()
+            name = row.get("name") or None
+            email = (row.get("email") or "").lower() or None
+
+            try:
+                validate_pin(pin, department)
+                if name and len(name) > MAX_NAME:
+                    raise ValueError(f"Name longer than {MAX_NAME} characters")
+                if email and ("@" not in email or len(email) > MAX_EMAIL):
+                    raise ValueError("Invalid email")
+                if pin in seen:
+                    raise ValueError("PIN repeated in this file")
+            except ValueError as e:
+                result.error(line, pin, str(e))
+                continue
+
+            seen.add(pin)
+            batch.append({"pin": pin, "name": name, "email": email, "department": department})
+            if len(batch) >= batch_size:
+                _insert(batch, result)
+                # Earlier batches are in the table, so the skip check sees them
+                batch, seen = [], set()
+
+        _insert(batch, result)
+
+    except UnicodeDecodeError:
+        result.error(reader.line_num + 1, "", "File is not UTF-8 text; import stopped here")
+    except csv.Error as e:
+        result.error(reader.line_num, "", f"Malformed CSV ({e}); import stopped here")
+
+    return result
+
+
+def _insert(batch, result):
+    if not batch:
+        return
+
+    existing = set(db.session.scalars(
+        select(RosterEntry.pin).where(RosterEntry.pin.in_([row["pin"] for row in batch]))
+    ))
+    rows = [row for row in batch if row["pin"] not in existing]
+
+    if rows:
+        db.session.execute(insert(RosterEntry), rows)
+    # One short transaction per batch (SQLite holds the write lock until commit)
+    db.session.commit()
+
+    result.inserted += len(rows)
+    result.skipped += len(batch) - len(rows)
@@ -0,0 +1,172 @@
+# search.py
+# Full-text search over complaint titles, descriptions and responses.
+#
+# SQLite: an external-content FTS5 table (complaint_fts) kept in step with the
+# complaint table by triggers, so inserts and responses update the index in
+# the same transaction. MySQL: the FULLTEXT index ix_complaint_fulltext on
+# the complaint table itself (see models.py). Queries never rebuild anything.
+import re
+
+import click
+from flask import Blueprint, current_app, flash, redirect, render_template, request
+from flask.cli import with_appcontext
+from flask_login import current_user, login_required
+from markupsafe import Markup, escape
+from sqlalchemy import DDL, column, event, literal_column, table, text
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import joinedload
+
+from extensions import db
+from models import Complaint
+from query_counter import query_budget
+
+search = Blueprint('search', __name__)
+
+STAFF_ROLES = ("hod", "ao", "warden", "principal")
+
+# Snippet markers: never present in user text, escaped before <mark> goes in
+HIT_START, HIT_END = "\x02", "\x03"
+
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS complaint_fts USING fts5(
+        title, description, response,
+        content='complaint', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS complaint_fts_ai AFTER INSERT ON complaint BEGIN
+        INSERT INTO complaint_fts(rowid, title, description, response)
+        VALUES (new.id, new.title, new.description, new.response);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS complaint_fts_ad AFTER DELETE ON complaint BEGIN
+        INSERT INTO complaint_fts(complaint_fts, rowid, title, description, response)
+        VALUES ('delete', old.id, old.title, old.description, old.response);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS complaint_fts_au
+    AFTER UPDATE OF title, description, response ON complaint BEGIN
+        INSERT INTO complaint_fts(complaint_fts, rowid, title, description, response)
+        VALUES ('delete', old.id, old.title, old.description, old.response);
+        INSERT INTO complaint_fts(rowid, title, description, response)
+        VALUES (new.id, new.title, new.description, new.response);
+    END""",
+]
+
+# db.create_all() (init_db.py, app.py) gets the FTS table too
+for _statement in SQLITE_DDL:
+    event.listen(Complaint.__table__, "after_create",
+                 DDL(_statement).execute_if(dialect="sqlite"))
+
+complaint_fts = table("complaint_fts", column("rowid"))
+
+
+# ===================================================================
+# QUERY
+# ===================================================================
+def terms(q):
+    return re.findall(r"\w+", q.lower())[:10]
+
+
+def _scope(query, user):
+    """Same visibility as the dashboards."""
+    if user.role == "hod":
+        return query.filter(Complaint.assigned_to == "hod",
+                            Complaint.department == user.department)
+    if user.role in ("ao", "warden"):
+        return query.filter(Complaint.assigned_to == user.role)
+    return query
+
+
+def _sqlite_search(words, user, limit):
+    # Every word must match; the last one may be a prefix ("cool" → cooler)
+    expr = " ".join(f'"{w}"' for w in words[:-1]) + f' "{words[-1]}"*'
+
+    # Title hits weigh more than description, description more than response
+    rank = literal_column("bm25(complaint_fts, 10.0, 4.0, 1.0)")
+    snippet = literal_column(
+        f"snippet(complaint_fts, -1, '{HIT_START}', '{HIT_END}', '…', 16)"
+    )
+
+    query = (
+        db.session.query(Complaint, snippet)
+        .options(joinedload(Complaint.student))
+        .join(complaint_fts, complaint_fts.c.rowid == Complaint.id)
+        .filter(text("complaint_fts MATCH :match").bindparams(match=expr.strip()))
+    )
+    return _scope(query, user).order_by(rank).limit(limit).all()
+
+
+def _mysql_search(words, user, limit):
+    score = match(
+        Complaint.title, Complaint.description, Complaint.response,
+        against=" ".join(f"+{w}*" for w in words),
+    ).in_boolean_mode()
+
+    query = db.session.query(Complaint).options(joinedload(Complaint.student)).filter(score)
+    rows = _scope(query, user).order_by(score.desc()).limit(limit).all()
+    return [(c, _python_snippet(c, words)) for c in rows]
+
+
+def _python_snippet(complaint, words, width=120):
+    """MySQL has no snippet(): cut a window around the first hit."""
+    pattern = re.compile(r"\b(" + "|".join(map(re.escape, words)) + r")", re.I)
+
+    for field in (complaint.description, complaint.response, complaint.title):
+        m = pattern.search(field or "")
+        if not m:
+            continue
+        start = max(0, m.start() - width // 2)
+        piece = field[start:start + width]
+        piece = pattern.sub(lambda h: f"{HIT_START}{h.group(0)}{HIT_END}", piece)
+        return ("…" if start else "") + piece + ("…" if start + width < len(field) else "")
+    return (complaint.description or "")[:width]
+
+
+def highlight(snippet):
+    """Escape a snippet and turn the hit markers into <mark> tags."""
+    safe = str(escape(snippet or ""))
+    return Markup(safe.replace(HIT_START, "<mark>").replace(HIT_END, "</mark>"))
+
+
+def run(q, user, limit=None):
+    """[(complaint, snippet_markup)] best match first."""
+    words = terms(q)
+    if not words:
+        return []
+
+    limit = limit or current_app.config.get("SEARCH_RESULTS", 50)
+    if db.engine.dialect.name == "sqlite":
+        rows = _sqlite_search(words, user, limit)
+    else:
+        rows = _mysql_search(words, user, limit)
+    return [(c, highlight(snip)) for c, snip in rows]
+
+
+# ===================================================================
+# ROUTE
+# ===================================================================
+@search.route('/')
+@login_required
+@query_budget(2)
+def search_complaints():
+
+    if current_user.role not in STAFF_ROLES:
+        flash("Access denied", "danger")
+        return redirect('/')
+
+    q = request.args.get("q", "").strip()
+    results = run(q, current_user) if q else []
+
+    return render_template("search.html", q=q, results=results)
+
+
+@click.command("rebuild-search")
+@with_appcontext
+def rebuild_search_command():
+    """Repopulate the SQLite FTS5 index from the complaint table."""
+    if db.engine.dialect.name != "sqlite":
+        click.echo("MySQL maintains the FULLTEXT index itself; nothing to do.")
+        return
+
+    for statement in SQLITE_DDL:
+        db.session.execute(text(statement))
+    db.session.execute(text("INSERT INTO complaint_fts(complaint_fts) VALUES ('rebuild')"))
+    db.session.commit()
+    click.echo("Search index rebuilt.")
@@ -0,0 +1,169 @@
+# seed.py
+# Generate realistic-looking students, complaints, history and notifications.
+#
+#   DATABASE_URL=sqlite:////tmp/grievance.db python seed.py --students 500 --complaints 10000
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert
+from werkzeug.security import generate_password_hash
+
+from app import app
+from extensions import db
+from models import Complaint, ComplaintHistory, Notification, User
+from student import CATEGORIES
+import rollup
+
+DEPARTMENTS = {"CS": "CSE", "EC": "ECE"}
+STATUSES = ["Pending", "In Progress", "Resolved"]
+STATUS_WEIGHTS = [3, 2, 5]
+
+STAFF = [
+    dict(name='CSE HOD', email='csehod@example.com', department='CSE', role='hod', password='csehod123'),
+    dict(name='ECE HOD', email='ecehod@example.com', department='ECE', role='hod', password='ecehod123'),
+    dict(name='Principal', email='principal@example.com', department=None, role='principal', password='principal123'),
+    dict(name='Hostel Warden', email='warden@example.com', department=None, role='warden', password='warden123'),
+    dict(name='Accounts Officer', email='ao@example.com', department=None, role='ao', password='ao123'),
+]
+
+FIRST = ["Aarav", "Vivek", "Sai", "Rahul", "Anjali", "Sneha", "Kiran", "Priya",
+         "Ravi", "Lakshmi", "Arjun", "Divya", "Manoj", "Keerthi", "Nikhil", "Pooja"]
+LAST = ["Reddy", "Rao", "Goud", "Sharma", "Naidu", "Varma", "Kumar", "Yadav"]
+
+BATCH = 5000
+
+
+def _batched_insert(model, rows):
+    for i in range(0, len(rows), BATCH):
+        db.session.execute(insert(model), rows[i:i + BATCH])
+
+
+def _pins():
+    """Every valid PIN (same rules as auth.register), newest year first."""
+    this_year = datetime.now().year % 100
+    for yy in range(this_year, this_year - 10, -1):
+        for code in DEPARTMENTS:
+            for roll in range(1, 1000):
+                yield f"{yy:02d}189-{code}-{roll:03d}"
+
+
+def ensure_staff():
+    staff = {}
+    for s in STAFF:
+        user = User.query.filter_by(email=s['email']).first()
+        if not user:
+            user = User(name=s['name'], email=s['email'], pin=None,
+                        password=generate_password_hash(s['password']),
+                        department=s['department'], role=s['role'], approved=True)
+            db.session.add(user)
+        staff[(s['role'], s['department'])] = user
+    db.session.commit()
+    return staff
+
+
+def seed_students(n, rng):
+    taken = {p for (p,) in db.session.query(User.pin).filter(User.pin.isnot(None))}
+    # One hash for everyone: hashing per row would dominate the run time
+    password = generate_password_hash("student123")
+
+    rows = []
+    for pin in _pins():
+        if len(rows) == n:
+            break
+        if pin in taken:
+            continue
+        rows.append(dict(
+            name=f"{rng.choice(FIRST)} {rng.choice(LAST)}",
+            email=f"{pin.lower()}@students.example.com",
+            pin=pin,
+            password=password,
+            department=DEPARTMENTS[pin.split('-')[1]],
+            role='student',
+            approved=rng.random() > 0.05,
+        ))
+
+    _batched_insert(User, rows)
+    db.session.commit()
+    return len(rows)
+
+
+def seed_complaints(n, rng, days=730):
+    staff = ensure_staff()
+    students = db.session.query(User.id, User.department).filter(
+        User.role == 'student', User.approved.is_(True)
+    ).all()
+    if not students:
+        raise SystemExit("No approved students to file complaints; seed students first.")
+
+    categories = sorted(CATEGORIES)
+    next_id = (db.session.query(func.max(Complaint.id)).scalar() or 0) + 1
+    now = datetime.utcnow()
+
+    complaints, history, notes = [], [], []
+    for cid in range(next_id, next_id + n):
+        student_id, department = rng.choice(students)
+        category = rng.choice(categories)
+        assigned = CATEGORIES[category]
+        status = rng.choices(STATUSES, STATUS_WEIGHTS)[0]
+        created = now - timedelta(seconds=rng.randint(0, days * 86400))
+
+        handler = staff[(assigned, department if assigned == 'hod' else None)]
+        responded = created + timedelta(hours=rng.uniform(1, 96))
+        resolved = responded + timedelta(hours=rng.uniform(1, 240))
+
+        complaints.append(dict(
+            id=cid,
+            title=f"{category.replace('_', ' ').title()} #{cid}",
+            description=f"Seeded complaint about {category.replace('_', ' ')}. " * 3,
+            category=category,
+            status=status,
+            assigned_to=assigned,
+            department=department,
+            student_id=student_id,
+            created_at=created,
+            response=None if status == 'Pending' else "We are looking into it.",
+            response_by=None if status == 'Pending' else handler.name,
+            resolved_at=resolved if status == 'Resolved' else None,
+        ))
+
+        notes.append(dict(user_id=handler.id, message=f"New complaint submitted: #{cid}",
+                          is_read=status != 'Pending', created_at=created))
+
+        if status != 'Pending':
+            history.append(dict(complaint_id=cid, action=f"Responded by {assigned.upper()}",
+                                message="We are looking into it.", performed_by=handler.name,
+                                created_at=responded))
+        if status == 'Resolved':
+            history.append(dict(complaint_id=cid, action=f"Resolved by {assigned.upper()}",
+                                message="AFTER work proof submitted", performed_by=handler.name,
+                                created_at=resolved))
+
+    _batched_insert(Complaint, complaints)
+    _batched_insert(ComplaintHistory, history)
+    _batched_insert(Notification, notes)
+    db.session.commit()
+
+    rollup.rebuild()
+    return len(complaints)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the grievance portal with synthetic data.")
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--complaints", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42, help="random seed for repeatable data")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        db.create_all()
+        ensure_staff()
+        s = seed_students(args.students, rng)
+        c = seed_complaints(args.complaints, rng)
+        print(f"Seeded {s} students and {c} complaints into {db.engine.url!r}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# sqlite_profile.py
+# Single-node deployments on an SQLite file (DB_BACKEND=sqlite), no DB server.
+#
+# Every SQLite connection gets WAL (readers never block the writer),
+# synchronous=NORMAL (fsync at checkpoints, not every commit), a memory map,
+# a busy_timeout and foreign key enforcement.
+#
+# Concurrent gunicorn workers: pysqlite's default BEGIN is DEFERRED, so a
+# request that read first and then writes must upgrade its lock, and in WAL
+# that upgrade fails at once (SQLITE_BUSY, busy_timeout is not honoured) if
+# another worker committed in between. Write requests (POST etc., CLI
+# commands, the outbox thread, views marked @writes) therefore start with
+# BEGIN IMMEDIATE and queue on busy_timeout. Plain GETs stay DEFERRED so page
+# views never wait on the write lock.
+from functools import wraps
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _write_transaction():
+    if not has_request_context():
+        return True
+    return request.method not in SAFE_METHODS or g.get("db_writes", False)
+
+
+def writes(view):
+    """A GET view that writes; place above @login_required (the user load opens the transaction)."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        g.db_writes = True
+        return view(*args, **kwargs)
+    return wrapped
+
+
+def configure_engine(engine, config):
+    pragmas = (
+        ("journal_mode", "WAL"),
+        ("synchronous", "NORMAL"),
+        ("busy_timeout", config.get("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+        ("mmap_size", config.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+        ("cache_size", -config.get("SQLITE_CACHE_KB", 16 * 1024)),
+        ("foreign_keys", "ON"),
+    )
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        # Let SQLAlchemy's "begin" event below issue BEGIN, not pysqlite
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(conn):
+        # On the raw connection: transaction control isn't a query to count
+        conn.connection.driver_connection.execute(
+            "BEGIN IMMEDIATE" if _write_transaction() else "BEGIN")
+
+
+def init_app(app, db):
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite":
+                configure_engine(engine, app.config)
@@ -1,9 +1,22 @@
 # student.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, send_from_directory
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, abort, jsonify
 from flask_login import login_required, current_user
 from extensions import db
-from models import Complaint, User, Notification
-import os, uuid
+from models import Complaint, User
+from query_counter import query_budget
+from db_routing import read_replica
+from pagination import keyset_paginate
+import rollup
+import outbox
+import duplicates
+import fragments
+import user_cache
+from sqlalchemy import func, or_
+from uploads import save_upload, can_view, send_upload
+from werkzeug.security import generate_password_hash
+import thumbnails
+import os
+from datetime import datetime, timedelta
 
 student = Blueprint('student', __name__, template_folder='templates/student')
 
@@ -44,6 +57,29 @@ CATEGORIES = {
 }
 
 
+# ===================================================================
+# SLA — HOURS A COMPLAINT MAY STAY PENDING BEFORE IT IS ESCALATED
+# ===================================================================
+SLA_HOURS = {
+    "warden": 48,
+    "hod": 72,
+    "ao": 120,
+}
+
+# Categories that cannot wait as long as their staff's default
+CATEGORY_SLA_HOURS = {
+    "hostel_security": 12,
+    "electricity_issues": 24,
+    "water_issues": 24,
+    "bathroom_plumbing": 24,
+    "faculty_misbehavior": 48,
+}
+
+
+def sla_hours(category):
+    return CATEGORY_SLA_HOURS.get(category, SLA_HOURS[CATEGORIES.get(category, "hod")])
+
+
 # ===================================================================
 # FILE NEW COMPLAINT
 # ===================================================================
@@ -60,18 +96,11 @@ def new_complaint():
             flash("Please fill all fields.", "danger")
             return redirect(url_for('student.new_complaint'))
 
-        upload_dir = current_app.config.get("UPLOAD_FOLDER", "uploads")
-        os.makedirs(upload_dir, exist_ok=True)
-
-        file_list = []
-        for f in request.files.getlist("attachments"):
-            if f and f.filename:
-                ext = os.path.splitext(f.filename)[1]
-                fname = f"{uuid.uuid4().hex}{ext}"
-                f.save(os.path.join(upload_dir, fname))
-                file_list.append(fname)
-
-        attachments = ",".join(file_list) if file_list else None
+        attachments = [
+            save_upload(f, "student")
+            for f in request.files.getlist("attachments")
+            if f and f.filename
+        ]
 
         assigned_role = CATEGORIES.get(category, "hod")
 
@@ -79,7 +108,7 @@ def new_complaint():
             title=title,
             description=description,
             category=category,
-            attachment=attachments,
+            attachments=attachments,
             student_id=current_user.id,
             status="Pending",
             assigned_to=assigned_role,
@@ -87,38 +116,140 @@ def new_complaint():
         )
 
         db.session.add(complaint)
+        db.session.flush()
+        duplicates.index(complaint)
+        rollup.record_created(complaint)
+        fragments.complaint_changed(complaint)
+
+        # Staff are notified by the outbox dispatcher, committed together.
+        # A near-duplicate just joins its cluster on their dashboard (and
+        # follows the root's deadline).
+        if complaint.cluster_id is None:
+            complaint.due_at = datetime.utcnow() + timedelta(hours=sla_hours(category))
+            outbox.enqueue(
+                "complaint_created",
+                complaint_id=complaint.id,
+                title=complaint.title,
+                assigned_to=assigned_role,
+                department=complaint.department,
+            )
         db.session.commit()
 
-        # Notify staff
-        staff = None
-        if assigned_role == "hod":
-            staff = User.query.filter_by(role="hod", department=current_user.department).first()
+        if complaint.cluster_id is not None:
+            flash("Complaint submitted! It matches an open complaint and will "
+                  "be handled together with it.", "success")
         else:
-            staff = User.query.filter_by(role=assigned_role).first()
-
-        if staff:
-            db.session.add(Notification(
-                user_id=staff.id,
-                message=f"New complaint submitted: {complaint.title}"
-            ))
-            db.session.commit()
-
-        flash("Complaint submitted successfully!", "success")
+            flash("Complaint submitted successfully!", "success")
         return redirect(url_for("student.my_complaints"))
 
     return render_template("student/complaint_form.html",
                            categories=sorted(CATEGORIES.keys()))
 
 
+# ===================================================================
+# LIKELY DUPLICATES (while filling the form) / JOIN ONE
+# ===================================================================
+@student.route('/complaint/similar', methods=['POST'])
+@login_required
+def similar_complaints():
+    # Text fields only; a multipart body would run its file parts through
+    # the upload checks (and into UPLOAD_FOLDER) on every keystroke
+    if request.mimetype != "application/x-www-form-urlencoded":
+        return jsonify(matches=[], error="Send title, description and category only."), 415
+
+    category = request.form.get('category', '')
+    assigned_role = CATEGORIES.get(category, "hod")
+
+    matches = duplicates.find_similar(
+        request.form.get('title'), request.form.get('description'),
+        category, assigned_role, current_user.department,
+    )
+    if not matches:
+        return jsonify(matches=[])
+
+    roots = {c.id: c for c in Complaint.query.filter(
+        Complaint.id.in_([root_id for root_id, _ in matches]))}
+    sizes = duplicates.cluster_sizes(list(roots))
+
+    return jsonify(matches=[
+        {
+            "id": root_id,
+            "title": roots[root_id].title,
+            "status": roots[root_id].status,
+            "reports": sizes.get(root_id, 0) + 1,
+            "similarity": round(score, 2),
+        }
+        for root_id, score in matches if root_id in roots
+    ])
+
+
+@student.route('/complaint/<int:cid>/join', methods=['POST'])
+@login_required
+def join_complaint(cid):
+
+    root = Complaint.query.get_or_404(cid)
+    if root.cluster_id is not None:
+        root = Complaint.query.get_or_404(root.cluster_id)
+
+    allowed = (
+        root.category in duplicates.SHARED_CATEGORIES
+        and root.status != "Resolved"
+        and (root.assigned_to != "hod" or root.department == current_user.department)
+    )
+    if not allowed:
+        abort(404)
+
+    already = Complaint.query.filter(
+        Complaint.student_id == current_user.id,
+        or_(Complaint.id == root.id, Complaint.cluster_id == root.id),
+    ).first()
+    if already:
+        flash("You have already reported this issue.", "info")
+        return redirect(url_for("student.complaint_view", cid=already.id))
+
+    complaint = Complaint(
+        title=root.title,
+        description=request.form.get('description') or root.description,
+        category=root.category,
+        student_id=current_user.id,
+        assigned_to=root.assigned_to,
+        department=current_user.department,
+    )
+    duplicates.follow(complaint, root)
+
+    db.session.add(complaint)
+    db.session.flush()
+    duplicates.index(complaint)
+    rollup.record_created(complaint)
+    fragments.complaint_changed(complaint)
+    db.session.commit()
+
+    flash("You have joined this complaint and will be notified of its progress.", "success")
+    return redirect(url_for("student.my_complaints"))
+
+
 # ===================================================================
 # MY COMPLAINTS LIST
 # ===================================================================
 @student.route('/my_complaints')
 @login_required
+@query_budget(3)
+@read_replica
 def my_complaints():
-    complaints = Complaint.query.filter_by(student_id=current_user.id)\
-                                .order_by(Complaint.created_at.desc()).all()
-    return render_template("student/my_complaints.html", complaints=complaints)
+    complaints = keyset_paginate(
+        Complaint.query.filter_by(student_id=current_user.id)
+    )
+
+    # Stat cards cover every complaint, not just this page
+    status_counts = dict(
+        db.session.query(Complaint.status, func.count(Complaint.id))
+        .filter(Complaint.student_id == current_user.id)
+        .group_by(Complaint.status).all()
+    )
+
+    return render_template("student/my_complaints.html",
+                           complaints=complaints,
+                           status_counts=status_counts)
 
 
 # ===================================================================
@@ -135,8 +266,7 @@ def complaint_view(cid):
         flash("You are not allowed to view this complaint.", "danger")
         return redirect(url_for("student.my_complaints"))
 
-    # Split attachments into list
-    files = complaint.attachment.split(",") if complaint.attachment else []
+    files = complaint.files("student")
 
     return render_template("student/complaint_view.html",
                        complaint=complaint,
@@ -150,8 +280,29 @@ def complaint_view(cid):
 @student.route('/view_file/<path:filename>')
 @login_required
 def view_file(filename):
+    if not can_view(current_user, filename):
+        abort(404)
+
     folder = current_app.config['UPLOAD_FOLDER']
-    return send_from_directory(folder, filename)
+    return send_upload(folder, filename)
+
+
+# ===================================================================
+# VIEW THUMBNAIL / PREVIEW (original until the derivative is ready)
+# ===================================================================
+@student.route('/view_file/<any(thumb, preview):size>/<path:filename>')
+@login_required
+def view_derivative(size, filename):
+    if not can_view(current_user, filename):
+        abort(404)
+
+    derived = os.path.join(current_app.config['DERIVATIVE_FOLDER'], size)
+    name = thumbnails.derivative_name(filename)
+
+    if os.path.exists(os.path.join(derived, name)):
+        return send_upload(derived, name, variant=size)
+
+    return send_upload(current_app.config['UPLOAD_FOLDER'], filename)
 
 
 # ===================================================================
@@ -166,14 +317,20 @@ def profile():
         email = request.form.get("email")
         pwd = request.form.get("password")
 
+        # current_user is a cached snapshot; change the real row
+        user = User.query.get_or_404(current_user.id)
+
         if name:
-            current_user.name = name
+            user.name = name
         if email:
-            current_user.email = email
+            user.email = email
         if pwd:
-            current_user.password = generate_password_hash(pwd)
+            user.password = generate_password_hash(pwd)
 
+        # Staff dashboards show the student's name
+        fragments.student_changed(user)
         db.session.commit()
+        user_cache.invalidate(user.id)
         flash("Profile updated successfully!", "success")
         return redirect(url_for("student.profile"))
 
@@ -0,0 +1,166 @@
+# throttle.py
+# Login throttling: token buckets per login id and per client IP, checked
+# before any password hash is computed, plus progressive backoff for a login
+# id that keeps failing.
+#
+# State lives in a small SQLite file (LOGIN_THROTTLE_DB) so every gunicorn
+# worker on the host sees the same buckets. Rows idle for longer than a
+# bucket takes to refill are pruned and the table is capped at
+# LOGIN_THROTTLE_MAX_KEYS rows.
+import math
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app
+
+import metrics
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bucket (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    failures INTEGER NOT NULL DEFAULT 0,
+    blocked_until REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_bucket_updated ON bucket (updated);
+"""
+
+PRUNE_EVERY = 200       # writes between prune passes (per process)
+
+_local = threading.local()
+_writes = 0
+
+
+@contextmanager
+def _transaction():
+    config = current_app.config
+    path = config["LOGIN_THROTTLE_DB"]
+
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid() or _local.path != path:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = sqlite3.connect(path, timeout=2, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        _local.conn, _local.pid, _local.path = conn, os.getpid(), path
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _limits(loginid, ip):
+    """[(key, capacity, tokens per second)] for one attempt."""
+    config = current_app.config
+    limits = [(f"ip:{ip}", config["LOGIN_IP_BURST"], config["LOGIN_IP_PER_MINUTE"] / 60)]
+    if loginid:
+        limits.append((f"id:{loginid}", config["LOGIN_ID_BURST"], config["LOGIN_ID_PER_MINUTE"] / 60))
+    return limits
+
+
+def _backoff(failures):
+    config = current_app.config
+    over = failures - config["LOGIN_BACKOFF_AFTER"]
+    if over < 0:
+        return 0
+    return min(config["LOGIN_BACKOFF_MAX_SECONDS"], 2 ** (over + 1))
+
+
+def acquire(loginid, ip):
+    """Take one token from each bucket. Returns 0, or seconds to wait if throttled."""
+    if not current_app.config.get("LOGIN_THROTTLE_ENABLED", True):
+        return 0
+
+    now = time.time()
+    limits = _limits(loginid, ip)
+
+    with _transaction() as conn:
+        rows = {
+            key: (tokens, updated, blocked)
+            for key, tokens, updated, blocked in conn.execute(
+                f"SELECT key, tokens, updated, blocked_until FROM bucket "
+                f"WHERE key IN ({','.join('?' * len(limits))})",
+                [key for key, _, _ in limits],
+            )
+        }
+
+        wait, reason, refilled = 0, None, []
+        for key, capacity, rate in limits:
+            tokens, updated, blocked = rows.get(key, (capacity, now, 0))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            refilled.append((key, tokens))
+
+            if blocked > now and blocked - now > wait:
+                wait, reason = blocked - now, "backoff"
+            elif tokens < 1 and (1 - tokens) / rate > wait:
+                wait, reason = (1 - tokens) / rate, key.split(":", 1)[0]
+
+        if wait:
+            metrics.LOGIN_THROTTLED.labels(reason=reason).inc()
+            return math.ceil(wait)
+
+        conn.executemany(
+            "INSERT INTO bucket (key, tokens, updated) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+            [(key, tokens - 1, now) for key, tokens in refilled],
+        )
+        _maybe_prune(conn, now)
+
+    return 0
+
+
+def failed(loginid):
+    """Count a wrong password; past LOGIN_BACKOFF_AFTER the id is blocked for 2, 4, 8... s."""
+    if not loginid or not current_app.config.get("LOGIN_THROTTLE_ENABLED", True):
+        return
+
+    key, now = f"id:{loginid}", time.time()
+    with _transaction() as conn:
+        row = conn.execute("SELECT failures FROM bucket WHERE key = ?", (key,)).fetchone()
+        failures = (row[0] if row else 0) + 1
+        conn.execute(
+            "INSERT INTO bucket (key, tokens, updated, failures, blocked_until) VALUES (?, 0, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET failures = excluded.failures, "
+            "blocked_until = excluded.blocked_until",
+            (key, now, failures, now + _backoff(failures)),
+        )
+
+
+def succeeded(loginid):
+    """A correct password clears the id's failures and backoff."""
+    if not loginid or not current_app.config.get("LOGIN_THROTTLE_ENABLED", True):
+        return
+    with _transaction() as conn:
+        conn.execute("DELETE FROM bucket WHERE key = ?", (f"id:{loginid}",))
+
+
+def _maybe_prune(conn, now):
+    global _writes
+    _writes += 1
+    if _writes % PRUNE_EVERY:
+        return
+
+    config = current_app.config
+    # A bucket idle this long is full again and unblocked: same as no row
+    idle = max(
+        config["LOGIN_IP_BURST"] / (config["LOGIN_IP_PER_MINUTE"] / 60),
+        config["LOGIN_ID_BURST"] / (config["LOGIN_ID_PER_MINUTE"] / 60),
+        config["LOGIN_BACKOFF_MAX_SECONDS"],
+    )
+    conn.execute("DELETE FROM bucket WHERE updated < ? AND blocked_until < ?", (now - idle, now))
+
+    excess = conn.execute("SELECT COUNT(*) FROM bucket").fetchone()[0] - config["LOGIN_THROTTLE_MAX_KEYS"]
+    if excess > 0:
+        conn.execute(
+            "DELETE FROM bucket WHERE key IN (SELECT key FROM bucket ORDER BY updated LIMIT ?)",
+            (excess,),
+        )
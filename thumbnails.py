@@ -0,0 +1,97 @@
+# thumbnails.py
+# Downscaled JPEG derivatives of uploaded photos, built off the request path.
+#
+# save_upload() schedules generation on a small thread pool; the
+# student.view_derivative route serves the derivative once it exists and the
+# original until then.
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+log = logging.getLogger(__name__)
+
+# name → bounding box in pixels
+SIZES = {
+    "thumb": (320, 320),      # dashboard / list thumbnails
+    "preview": (1280, 1280),  # complaint detail view
+}
+
+_executor = None
+
+
+def derivative_name(filename):
+    return os.path.splitext(filename)[0] + ".jpg"
+
+
+def derivative_path(derived_dir, size, filename):
+    return os.path.join(derived_dir, size, derivative_name(filename))
+
+
+def generate(upload_dir, derived_dir, filename):
+    """Write every missing derivative of one upload. Returns how many were made."""
+    made = 0
+    source = os.path.join(upload_dir, filename)
+
+    try:
+        with Image.open(source) as img:
+            img = ImageOps.exif_transpose(img).convert("RGB")
+
+            for size, box in SIZES.items():
+                target = derivative_path(derived_dir, size, filename)
+                if os.path.exists(target):
+                    continue
+                if img.width <= box[0] and img.height <= box[1]:
+                    # Already small enough; the original is served instead
+                    continue
+
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                copy = img.copy()
+                copy.thumbnail(box, Image.LANCZOS)
+
+                tmp = f"{target}.{os.getpid()}.tmp"
+                copy.save(tmp, "JPEG", quality=80, optimize=True, progressive=True)
+                os.replace(tmp, target)
+                made += 1
+
+    except (UnidentifiedImageError, OSError) as e:
+        # Not an image Pillow understands (PDF, video, HEIC...): the
+        # serving route keeps falling back to the original.
+        log.info("No derivative for %s: %s", filename, e)
+
+    return made
+
+
+def schedule(filename):
+    """Queue derivative generation for a freshly stored upload."""
+    global _executor
+    config = current_app.config
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=config["THUMBNAIL_WORKERS"],
+            thread_name_prefix="thumbnails",
+        )
+
+    _executor.submit(generate, config["UPLOAD_FOLDER"], config["DERIVATIVE_FOLDER"], filename)
+
+
+@click.command("backfill-thumbnails")
+@with_appcontext
+def backfill_thumbnails_command():
+    """Build missing derivatives for everything already in UPLOAD_FOLDER."""
+    upload_dir = current_app.config["UPLOAD_FOLDER"]
+    derived_dir = current_app.config["DERIVATIVE_FOLDER"]
+
+    seen = made = 0
+    for entry in os.scandir(upload_dir):
+        if not entry.is_file() or entry.name.startswith("."):
+            continue
+        seen += 1
+        made += generate(upload_dir, derived_dir, entry.name)
+
+    click.echo(f"Checked {seen} uploads, wrote {made} derivatives.")
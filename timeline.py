@@ -0,0 +1,118 @@
+# timeline.py
+# Complaint timelines: ComplaintHistory newest first, cursor-paged like the
+# dashboards (pagination.keyset_paginate on created_at, id) so a complaint
+# with thousands of events costs one index range read per page on
+# ix_complaint_history_complaint_created.
+#
+# Staff lists show each complaint's latest events through latest_events(),
+# one windowed SELECT for the whole page instead of one per complaint.
+from flask import Blueprint, abort, current_app, jsonify, render_template, request
+from flask_login import current_user, login_required
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+
+from db_routing import read_replica
+from extensions import db
+from models import Complaint, ComplaintHistory
+from pagination import keyset_paginate
+from query_counter import query_budget
+
+timeline = Blueprint('timeline', __name__)
+
+MAX_PER_PAGE = 100
+
+
+def visible(user, complaint):
+    """Same visibility rules as the complaint pages."""
+    if user.role == "principal":
+        return True
+    if user.role == "student":
+        return complaint.student_id == user.id
+    if user.role == "hod":
+        return complaint.department == user.department
+    if user.role in ("ao", "warden"):
+        return complaint.assigned_to == user.role
+    return False
+
+
+def history_page(complaint_id, per_page=None):
+    """One KeysetPage of a complaint's events, newest first (after/before request args)."""
+    return keyset_paginate(
+        ComplaintHistory.query.filter_by(complaint_id=complaint_id),
+        per_page=per_page or current_app.config.get("TIMELINE_PER_PAGE", 20),
+        model=ComplaintHistory,
+    )
+
+
+def latest_events(complaint_ids, per_complaint=None):
+    """{complaint_id: [ComplaintHistory, newest first]} for a page of complaints, in one query."""
+    if not complaint_ids:
+        return {}
+    n = per_complaint or current_app.config.get("TIMELINE_PREVIEW", 3)
+
+    rank = func.row_number().over(
+        partition_by=ComplaintHistory.complaint_id,
+        order_by=(ComplaintHistory.created_at.desc(), ComplaintHistory.id.desc()),
+    ).label("rank")
+    ranked = (
+        select(ComplaintHistory, rank)
+        .where(ComplaintHistory.complaint_id.in_(complaint_ids))
+        .subquery()
+    )
+    event = aliased(ComplaintHistory, ranked)
+
+    rows = db.session.execute(select(event, ranked.c.rank).where(ranked.c.rank <= n)).all()
+
+    out = {}
+    for e, _ in sorted(rows, key=lambda row: (row[0].complaint_id, row[1])):
+        out.setdefault(e.complaint_id, []).append(e)
+    return out
+
+
+def _event_json(e):
+    return {
+        "id": e.id,
+        "action": e.action,
+        "message": e.message,
+        "performed_by": e.performed_by,
+        "created_at": e.created_at.isoformat() if e.created_at else None,
+    }
+
+
+def _complaint_or_404(complaint_id):
+    complaint = Complaint.query.get_or_404(complaint_id)
+    if not visible(current_user, complaint):
+        abort(404)
+    return complaint
+
+
+# ===================================================================
+# ROUTES
+# ===================================================================
+@timeline.route('/<int:complaint_id>')
+@login_required
+@query_budget(3)
+@read_replica
+def complaint_timeline(complaint_id):
+    complaint = _complaint_or_404(complaint_id)
+    return render_template("timeline.html", complaint=complaint,
+                           events=history_page(complaint.id))
+
+
+@timeline.route('/<int:complaint_id>/events')
+@login_required
+@query_budget(3)
+@read_replica
+def complaint_events(complaint_id):
+    complaint = _complaint_or_404(complaint_id)
+    limit = request.args.get("limit", type=int)
+    if limit:
+        limit = max(1, min(limit, MAX_PER_PAGE))
+
+    page = history_page(complaint.id, per_page=limit)
+    return jsonify(
+        complaint_id=complaint.id,
+        events=[_event_json(e) for e in page],
+        next=page.next_cursor,
+        prev=page.prev_cursor,
+    )
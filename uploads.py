@@ -0,0 +1,316 @@
+# uploads.py
+# Streaming, content-addressed storage for complaint attachments.
+#
+# Every file part of a multipart request is written straight into a temp file
+# inside UPLOAD_FOLDER while it is being parsed, hashed on the fly and sniffed
+# with libmagic from its first bytes. Oversized or disallowed parts abort the
+# request before the rest of the body is written. Accepted files are renamed
+# to <sha256><ext>, so the same photo uploaded twice is stored once.
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+
+import magic
+from flask import Request, abort, current_app, flash, redirect, request, send_from_directory
+from sqlalchemy import func
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+from werkzeug.security import safe_join
+
+import metrics
+import thumbnails
+from extensions import db
+from models import Attachment, Complaint
+
+SNIFF_BYTES = 2048
+CHUNK = 64 * 1024
+
+# Sniffed MIME types libmagic reports with a less useful extension
+EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/heic": ".heic",
+    "video/quicktime": ".mov",
+}
+
+
+def _human(n):
+    if n >= 1024 * 1024:
+        return f"{n / (1024 * 1024):.0f} MB"
+    return f"{n / 1024:.0f} KB"
+
+
+class UploadStream:
+    """Writable file object a multipart part is streamed into."""
+
+    def __init__(self, upload_dir, max_bytes, allowed):
+        os.makedirs(upload_dir, exist_ok=True)
+        self._file = tempfile.NamedTemporaryFile(
+            dir=upload_dir, prefix=".incoming-", delete=False
+        )
+        self.max_bytes = max_bytes
+        self.allowed = allowed
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.mime_type = None
+        self._head = b""
+        self._stored = False
+
+    # ---- written by the form parser --------------------------------
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            self._reject("too_large")
+            raise RequestEntityTooLarge(
+                f"Each file must be at most {_human(self.max_bytes)}."
+            )
+
+        if self.mime_type is None:
+            self._head += data[:SNIFF_BYTES]
+            if len(self._head) >= SNIFF_BYTES:
+                self._sniff()
+
+        self.sha256.update(data)
+        return self._file.write(data)
+
+    def _sniff(self):
+        if not self._head:
+            # Nothing to sniff, so nothing to check the type of
+            self._reject("empty")
+            raise UnsupportedMediaType("Empty files can't be attached.")
+        self.mime_type = magic.from_buffer(self._head[:SNIFF_BYTES], mime=True)
+        if self.mime_type not in self.allowed:
+            self._reject("type")
+            raise UnsupportedMediaType(f"Files of type {self.mime_type} are not allowed.")
+
+    def _reject(self, reason):
+        metrics.UPLOAD_REJECTED.labels(reason=reason).inc()
+        self.close()
+
+    # ---- read back by FileStorage ----------------------------------
+    def seek(self, *args):
+        # The parser seeks to 0 once the part is complete
+        if self.mime_type is None:
+            self._sniff()
+        return self._file.seek(*args)
+
+    def read(self, *args):
+        return self._file.read(*args)
+
+    def readline(self, *args):
+        return self._file.readline(*args)
+
+    def tell(self):
+        return self._file.tell()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+        if not self._stored:
+            try:
+                os.unlink(self._file.name)
+            except FileNotFoundError:
+                pass
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    # ---- move into the content-addressed store ---------------------
+    def store(self, upload_dir, filename):
+        """Rename into place and return (stored_name, written_bytes)."""
+        if self.mime_type is None:
+            self._sniff()
+        self._file.flush()
+        ext = EXTENSIONS.get(self.mime_type) or mimetypes.guess_extension(self.mime_type) \
+            or os.path.splitext(filename)[1].lower()
+        name = f"{self.sha256.hexdigest()}{ext}"
+        target = os.path.join(upload_dir, name)
+
+        if os.path.exists(target):
+            self.close()
+            return name, 0
+
+        self._file.close()
+        os.replace(self._file.name, target)
+        self._stored = True
+        return name, self.size
+
+
+class UploadRequest(Request):
+    """Stream file parts through UploadStream instead of werkzeug's spool."""
+
+    def _get_file_stream(self, total_content_length, content_type,
+                         filename=None, content_length=None):
+        view = current_app.view_functions.get(self.endpoint)
+        if not filename or getattr(view, "raw_files", False):
+            return super()._get_file_stream(
+                total_content_length, content_type, filename, content_length
+            )
+        config = current_app.config
+        stream = UploadStream(
+            config["UPLOAD_FOLDER"],
+            config["UPLOAD_MAX_FILE_BYTES"],
+            config["UPLOAD_ALLOWED_TYPES"],
+        )
+        # Parts parsed before a rejected one never reach request.files
+        self.__dict__.setdefault("_upload_streams", []).append(stream)
+        return stream
+
+    def close(self):
+        for stream in self.__dict__.get("_upload_streams", ()):
+            stream.close()
+        super().close()
+
+
+def raw_files(view):
+    """File parts of this view's requests are data (e.g. a CSV), not attachments.
+
+    They skip the attachment type / size checks and go to werkzeug's default
+    stream (memory for small files, a temp file otherwise).
+    """
+    view.raw_files = True
+    return view
+
+
+def save_upload(f, kind):
+    """Store a werkzeug FileStorage and return an (unsaved) Attachment row.
+
+    Callers append it to ``complaint.attachments``.
+    """
+    config = current_app.config
+    upload_dir = config["UPLOAD_FOLDER"]
+
+    stream = f.stream
+    if not isinstance(stream, UploadStream):
+        # Not parsed through UploadRequest: stream it through the same checks
+        stream = UploadStream(upload_dir, config["UPLOAD_MAX_FILE_BYTES"],
+                              config["UPLOAD_ALLOWED_TYPES"])
+        for chunk in iter(lambda: f.stream.read(CHUNK), b""):
+            stream.write(chunk)
+        stream.seek(0)
+
+    name, written = stream.store(upload_dir, f.filename)
+    metrics.UPLOAD_BYTES.labels(kind=kind).inc(written)
+
+    if written and stream.mime_type.startswith("image/"):
+        thumbnails.schedule(name)
+
+    return Attachment(
+        kind=kind,
+        stored_name=name,
+        size=stream.size,
+        mime_type=stream.mime_type,
+    )
+
+
+def first_attachments(complaints, kind="student"):
+    """{complaint_id: stored_name} of the first attachment of each complaint.
+
+    One query for a whole dashboard page.
+    """
+    ids = [c.id for c in complaints]
+    if not ids:
+        return {}
+
+    first = db.session.query(func.min(Attachment.id)).filter(
+        Attachment.complaint_id.in_(ids),
+        Attachment.kind == kind,
+    ).group_by(Attachment.complaint_id)
+
+    return dict(
+        db.session.query(Attachment.complaint_id, Attachment.stored_name)
+        .filter(Attachment.id.in_(first.scalar_subquery()))
+        .all()
+    )
+
+
+# ============================================================
+# SERVING
+# ============================================================
+CONTENT_ADDRESSED = re.compile(r"^[0-9a-f]{64}$")
+ONE_YEAR = 365 * 24 * 3600
+
+
+def can_view(user, filename):
+    """Same visibility rules as the complaint pages the file belongs to."""
+    if user.role == "principal":
+        return True
+
+    owners = db.session.query(
+        Complaint.student_id, Complaint.department, Complaint.assigned_to
+    ).join(Attachment).filter(Attachment.stored_name == filename)
+
+    for student_id, department, assigned_to in owners:
+        if user.role == "student" and student_id == user.id:
+            return True
+        if user.role == "hod" and department == user.department:
+            return True
+        if user.role in ("ao", "warden") and assigned_to == user.role:
+            return True
+    return False
+
+
+def send_upload(directory, name, variant=None):
+    """Serve a stored file with conditional GET, Range and private caching.
+
+    Content-addressed files get their SHA-256 as a strong ETag and are
+    cacheable for a year, since the bytes behind a name never change. With
+    UPLOAD_OFFLOAD = "x-accel" only the headers are produced here and nginx
+    streams the body, so a big download does not hold a gunicorn worker.
+    """
+    config = current_app.config
+    stem = os.path.splitext(os.path.basename(name))[0]
+
+    if CONTENT_ADDRESSED.match(stem):
+        etag = f"{variant}-{stem}" if variant else stem
+        max_age = ONE_YEAR
+    else:
+        etag, max_age = True, 3600   # legacy uuid names: werkzeug's etag
+
+    if config.get("UPLOAD_OFFLOAD") == "x-accel":
+        rv = _x_accel(directory, name, etag)
+    else:
+        # X-Sendfile (Apache / lighttpd) is handled by send_file itself via
+        # USE_X_SENDFILE; otherwise werkzeug serves 304 / 206 responses.
+        rv = send_from_directory(directory, name, etag=etag, max_age=max_age)
+
+    rv.cache_control.public = False
+    rv.cache_control.private = True
+    rv.cache_control.max_age = max_age
+    if max_age == ONE_YEAR:
+        rv.cache_control.immutable = True
+    return rv
+
+
+def _x_accel(directory, name, etag):
+    path = safe_join(directory, name)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    rv = current_app.response_class()
+    if isinstance(etag, str):
+        rv.set_etag(etag)
+        if request.if_none_match.contains(etag):
+            rv.status_code = 304
+            return rv
+
+    relative = os.path.relpath(path, current_app.config["UPLOAD_FOLDER"]).replace(os.sep, "/")
+    rv.headers["X-Accel-Redirect"] = f"{current_app.config['UPLOAD_OFFLOAD_PREFIX'].rstrip('/')}/{relative}"
+    rv.headers["Content-Type"] = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    return rv
+
+
+def init_app(app):
+    app.request_class = UploadRequest
+
+    @app.errorhandler(RequestEntityTooLarge)
+    @app.errorhandler(UnsupportedMediaType)
+    def _rejected_upload(e):
+        message = e.description
+        if message == RequestEntityTooLarge.description:
+            # Whole request over MAX_CONTENT_LENGTH, refused before reading it
+            limit = _human(app.config["MAX_CONTENT_LENGTH"])
+            message = f"Upload too large. At most {limit} per submission."
+        flash(message, "danger")
+        return redirect(request.path)
@@ -0,0 +1,66 @@
+# user_cache.py
+# The one Flask-Login user loader, backed by a per-process cache.
+#
+# current_user is a UserSnapshot: the plain columns of a User row, detached
+# from any session. Handlers that change a user load the real row, commit,
+# then call invalidate(user_id). Other worker processes pick the change up
+# when their entry expires (USER_CACHE_TTL seconds).
+from flask_login import UserMixin
+
+import metrics
+from cache import LocalCache
+from extensions import db, login_manager
+from models import User
+
+FIELDS = ("id", "name", "email", "pin", "department", "role", "approved", "created_at")
+
+_users = LocalCache(default_ttl=60, max_entries=5000)
+
+
+class UserSnapshot(UserMixin):
+    def __init__(self, user):
+        for field in FIELDS:
+            setattr(self, field, getattr(user, field))
+
+    def __repr__(self):
+        return f"<UserSnapshot {self.id} {self.role}>"
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    try:
+        uid = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    snapshot = _users.get(uid)
+    if snapshot is not None:
+        metrics.USER_CACHE.labels(result="hit").inc()
+        return snapshot
+
+    metrics.USER_CACHE.labels(result="miss").inc()
+    user = db.session.get(User, uid)
+    if user is None:
+        return None
+
+    snapshot = UserSnapshot(user)
+    _users.set(uid, snapshot)
+    return snapshot
+
+
+def invalidate(user_id):
+    """Drop a cached snapshot after the user row changed or was deleted."""
+    _users.delete(int(user_id))
+
+
+def stats():
+    return _users.stats()
+
+
+def init_app(app):
+    global _users
+    _users = LocalCache(
+        default_ttl=app.config.get("USER_CACHE_TTL", 60),
+        max_entries=app.config.get("USER_CACHE_SIZE", 5000),
+    )
+    login_manager.init_app(app)
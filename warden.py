@@ -1,9 +1,16 @@
 # warden.py (FINAL CLEAN VERSION)
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_required, current_user
-from extensions import db
-from models import Complaint, ComplaintHistory
-import os, uuid
+from models import Complaint
+from query_counter import query_budget
+from db_routing import read_replica
+from pagination import keyset_paginate
+import duplicates
+import fragments
+import workflow
+from sqlalchemy.orm import joinedload
+from timeline import latest_events
+from uploads import first_attachments
 
 warden = Blueprint('warden', __name__, template_folder='templates/warden')
 
@@ -13,17 +20,30 @@ warden = Blueprint('warden', __name__, template_folder='templates/warden')
 # =============================================================
 @warden.route('/dashboard')
 @login_required
+@query_budget(6)
+@read_replica
 def warden_dashboard():
 
     if current_user.role != 'warden':
         flash("Access denied", "danger")
         return redirect('/')
 
-    complaints = Complaint.query.filter_by(
-        assigned_to='warden'
-    ).order_by(Complaint.created_at.desc()).all()
+    def page():
+        complaints = keyset_paginate(
+            Complaint.query.options(
+                joinedload(Complaint.student)
+            ).filter_by(
+                assigned_to='warden',
+                cluster_id=None
+            )
+        )
+        return dict(complaints=complaints,
+                    first_files=first_attachments(complaints),
+                    cluster_sizes=duplicates.cluster_sizes([c.id for c in complaints]),
+                    timelines=latest_events([c.id for c in complaints]))
 
-    return render_template("warden/dashboard.html", complaints=complaints)
+    # Re-rendered only after a complaint in this queue changes
+    return fragments.render("warden/dashboard.html", "warden", page)
 
 
 
@@ -40,6 +60,11 @@ def respond(complaint_id):
 
     c = Complaint.query.get_or_404(complaint_id)
 
+    # Escalated or re-routed complaints are no longer in this queue
+    if not workflow.handles(current_user, c):
+        flash("This complaint is not assigned to you.", "warning")
+        return redirect(url_for("warden.warden_dashboard"))
+
     # Cannot respond again if already resolved
     if c.status == "Resolved":
         flash("This complaint is already resolved.", "info")
@@ -58,41 +83,14 @@ def respond(complaint_id):
             flash("Response cannot be empty!", "danger")
             return redirect(url_for('warden.respond', complaint_id=c.id))
 
-        upload_dir = current_app.config.get("UPLOAD_FOLDER", "uploads")
-        os.makedirs(upload_dir, exist_ok=True)
-
-        saved_before = []
-
-        # Save BEFORE files
-        for f in before_files:
-            if f and f.filename:
-                ext = os.path.splitext(f.filename)[1]
-                new_name = f"BEFORE_{uuid.uuid4().hex}{ext}"
-                f.save(os.path.join(upload_dir, new_name))
-                saved_before.append(new_name)
-
-        # Merge into before_files column
-        if saved_before:
-            existing = c.before_files.split(",") if c.before_files else []
-            c.before_files = ",".join(existing + saved_before)
-
-        # Update complaint
-        c.status = "In Progress"
-        c.response = response_text
-        c.response_by = current_user.name
-
-        db.session.add(c)
-
-        # History entry
-        h = ComplaintHistory(
-            complaint_id=c.id,
-            action="Responded by Warden (Before Work)",
-            message=response_text,
-            performed_by=current_user.name
-        )
-        db.session.add(h)
-
-        db.session.commit()
+        try:
+            workflow.transition(c, "respond", current_user.name,
+                                "Responded by Warden (Before Work)",
+                                response=response_text,
+                                files=[(f, "before") for f in before_files])
+        except workflow.TransitionError as e:
+            flash(str(e), "warning")
+            return redirect(url_for("warden.warden_dashboard"))
 
         flash("Response submitted! Work now In Progress.", "success")
         return redirect(url_for("warden.warden_dashboard"))
@@ -114,6 +112,11 @@ def resolve_complaint(complaint_id):
 
     c = Complaint.query.get_or_404(complaint_id)
 
+    # Escalated or re-routed complaints are no longer in this queue
+    if not workflow.handles(current_user, c):
+        flash("This complaint is not assigned to you.", "warning")
+        return redirect(url_for("warden.warden_dashboard"))
+
     # If already resolved → stop
     if c.status == "Resolved":
         flash("Already resolved!", "info")
@@ -121,40 +124,15 @@ def resolve_complaint(complaint_id):
 
     if request.method == "POST":
 
-        upload_dir = current_app.config.get("UPLOAD_FOLDER", "uploads")
-        os.makedirs(upload_dir, exist_ok=True)
-
         final_files = request.files.getlist("final_files")
-        saved_after = []
-
-        # Save AFTER files
-        for f in final_files:
-            if f and f.filename:
-                ext = os.path.splitext(f.filename)[1]
-                new_name = f"AFTER_{uuid.uuid4().hex}{ext}"
-                f.save(os.path.join(upload_dir, new_name))
-                saved_after.append(new_name)
-
-        # Merge into after_files column
-        if saved_after:
-            existing = c.after_files.split(",") if c.after_files else []
-            c.after_files = ",".join(existing + saved_after)
-
-        # Mark resolved
-        c.status = "Resolved"
-
-        db.session.add(c)
-
-        # History entry
-        h = ComplaintHistory(
-            complaint_id=c.id,
-            action="Resolved by Warden",
-            message="AFTER work proof submitted",
-            performed_by=current_user.name
-        )
-        db.session.add(h)
 
-        db.session.commit()
+        try:
+            workflow.transition(c, "resolve", current_user.name, "Resolved by Warden",
+                                message="AFTER work proof submitted",
+                                files=[(f, "after") for f in final_files])
+        except workflow.TransitionError as e:
+            flash(str(e), "warning")
+            return redirect(url_for("warden.warden_dashboard"))
 
         flash("Complaint resolved successfully!", "success")
         return redirect(url_for("warden.warden_dashboard"))
@@ -0,0 +1,103 @@
+# workflow.py
+# Complaint state machine shared by the HOD, AO, warden and principal views.
+#
+#   Pending ──respond──────────────▶ In Progress ──resolve──▶ Resolved
+#   Pending ──respond_and_resolve / resolve─────────────────▶ Resolved
+#
+# A transition is one conditional UPDATE ... WHERE id = ? AND status = ? AND
+# assigned_to = ?, using the state the view just read. If another request
+# moved the complaint meanwhile (or the SLA scheduler escalated it), no row
+# matches and Conflict is raised before anything is written, so two staff
+# clicking at once never overwrite each other's response. The history row,
+# attachments, rollup, outbox event, duplicate propagation and fragment
+# version bump all go into the same commit.
+from datetime import datetime
+
+from sqlalchemy import update
+
+import duplicates
+import fragments
+import outbox
+import rollup
+from extensions import db
+from models import Complaint, ComplaintHistory
+from uploads import save_upload
+
+PENDING, IN_PROGRESS, RESOLVED = "Pending", "In Progress", "Resolved"
+
+# action → (states it may start from, state it leads to)
+TRANSITIONS = {
+    "respond": ((PENDING,), IN_PROGRESS),
+    "respond_and_resolve": ((PENDING,), RESOLVED),
+    "resolve": ((PENDING, IN_PROGRESS), RESOLVED),
+}
+
+
+class TransitionError(Exception):
+    """The action is not allowed from the complaint's current state."""
+
+
+class Conflict(TransitionError):
+    """The complaint changed since it was read; nothing was written."""
+
+
+def allowed(complaint, action):
+    sources, _ = TRANSITIONS[action]
+    return (complaint.status or PENDING) in sources
+
+
+def handles(user, complaint):
+    """Whether the complaint is in this staff member's queue."""
+    if complaint.assigned_to != user.role:
+        return False
+    return user.role != "hod" or complaint.department == user.department
+
+
+def transition(complaint, action, performed_by, history_action,
+               response=None, message=None, files=()):
+    """Apply `action` to a complaint read in this request and commit.
+
+    `files` are (FileStorage, kind) pairs, attached once the state change
+    has been claimed. Raises TransitionError / Conflict without writing.
+    """
+    sources, target = TRANSITIONS[action]
+    old_status = complaint.status or PENDING
+    if old_status not in sources:
+        raise TransitionError(f"Complaint #{complaint.id} is already {old_status}.")
+
+    values = {"status": target, "due_at": None}
+    if response is not None:
+        values.update(response=response, response_by=performed_by)
+    if target == RESOLVED:
+        values["resolved_at"] = datetime.utcnow()
+
+    # Also brings the in-session complaint up to date (synchronize "evaluate")
+    claimed = db.session.execute(
+        update(Complaint)
+        .where(Complaint.id == complaint.id,
+               Complaint.status == complaint.status,
+               Complaint.assigned_to == complaint.assigned_to)
+        .values(**values)
+    ).rowcount
+    if claimed != 1:
+        db.session.rollback()
+        raise Conflict(f"Complaint #{complaint.id} was just updated by someone else. "
+                       "Reload it and try again.")
+
+    for f, kind in files:
+        if f and f.filename:
+            complaint.attachments.append(save_upload(f, kind))
+
+    rollup.record_status_change(complaint, old_status)
+    fragments.complaint_changed(complaint)
+    outbox.enqueue("complaint_status", complaint_id=complaint.id, student_id=complaint.student_id,
+                   title=complaint.title, status=target)
+    db.session.add(ComplaintHistory(
+        complaint_id=complaint.id,
+        action=history_action,
+        message=message if message is not None else response,
+        performed_by=performed_by,
+    ))
+    duplicates.propagate(complaint, performed_by)
+    db.session.commit()
+    return target